@@ -0,0 +1,176 @@
+"""
+Benchmark per-user lookups with and without the composite indexes
+
+Seeds synthetic rows and drops and recreates indexes (under an exclusive
+lock), so it only runs against a disposable PostgreSQL database given in
+BENCHMARK_DATABASE_URL whose name contains "bench" or "scratch". Migrate
+that database first; the benchmark never migrates:
+
+    DATABASE_URL=$BENCHMARK_DATABASE_URL python -m shared.migrations
+    python benchmark_queries.py --seed-users 2000 --events-per-user 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+
+from shared.database import MCPEventDB, QuestDB
+
+SCRATCH_MARKERS = ("bench", "scratch")
+
+EVENT_LOOKUP = text(
+    "SELECT event_id, user_id, source, action_type, meta_data, timestamp FROM mcp_events "
+    "WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 100"
+)
+QUEST_COUNT = text(
+    "SELECT count(*) FROM quests WHERE user_id = :user_id AND status = 'COMPLETED'"
+)
+
+# (query, composite index, single-column index it replaced)
+CASES = {
+    "detect-anomaly event lookup": (EVENT_LOOKUP, "ix_mcp_events_user_id_timestamp", "user_id"),
+    "feedback quest count": (QUEST_COUNT, "ix_quests_user_id_status", "user_id"),
+}
+
+
+def scratch_engine() -> Engine:
+    """
+    Engine for BENCHMARK_DATABASE_URL, which must name a scratch database
+
+    DATABASE_URL is deliberately ignored, so the benchmark cannot land on
+    the services' database by accident.
+    """
+    url = os.getenv("BENCHMARK_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCHMARK_DATABASE_URL to a disposable PostgreSQL database")
+    url = make_url(url)
+    if url.get_backend_name() != "postgresql":
+        sys.exit(f"The benchmark needs PostgreSQL, not {url.get_backend_name()}")
+    if not any(marker in (url.database or "").lower() for marker in SCRATCH_MARKERS):
+        sys.exit(
+            f"Refusing to run against '{url.database}': the database name must contain "
+            f"one of {SCRATCH_MARKERS} to mark it as disposable"
+        )
+    return create_engine(url)
+
+
+def check_schema(engine: Engine) -> bool:
+    with engine.connect() as connection:
+        missing = [
+            index for _, index, _ in CASES.values()
+            if not connection.execute(text("SELECT to_regclass(:name)"), {"name": index}).scalar()
+        ]
+    if missing:
+        print(f"Missing {', '.join(missing)}; migrate the benchmark database first")
+    return not missing
+
+
+def seed(engine: Engine, users: int, events_per_user: int):
+    """Insert synthetic users' events (within the last day's partitions) and quests"""
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, users, 100):
+            event_rows, quest_rows = [], []
+            for user in range(start, min(start + 100, users)):
+                user_id = f"0xbench{user:06d}"
+                for _ in range(events_per_user):
+                    event_rows.append({
+                        "event_id": str(uuid4()),
+                        "user_id": user_id,
+                        "source": random.choice(["web2", "web3"]),
+                        "action_type": random.choice(["complete_quest", "stake_tokens", "trade_nft"]),
+                        "meta_data": {"xp_earned": random.randint(10, 500)},
+                        "timestamp": now - timedelta(seconds=random.randint(0, 86400))
+                    })
+                for _ in range(20):
+                    quest_rows.append({
+                        "quest_id": str(uuid4()),
+                        "user_id": user_id,
+                        "difficulty_rating": random.randint(1, 10),
+                        "reward_xp": 100,
+                        "reward_gami": 0.1,
+                        "completion_criteria": {},
+                        "status": random.choice(["ACTIVE", "COMPLETED", "EXPIRED"])
+                    })
+            connection.execute(MCPEventDB.__table__.insert(), event_rows)
+            connection.execute(QuestDB.__table__.insert(), quest_rows)
+        connection.execute(text("ANALYZE mcp_events"))
+        connection.execute(text("ANALYZE quests"))
+
+
+def time_query(connection, query, user_ids, repeats: int):
+    latencies = []
+    for _ in range(repeats):
+        for user_id in user_ids:
+            started = time.perf_counter()
+            connection.execute(query, {"user_id": user_id}).all()
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def plan(connection, query, user_id):
+    rows = connection.execute(text(f"EXPLAIN {query.text}"), {"user_id": user_id}).all()
+    return rows[0][0].strip()
+
+
+def benchmark(engine: Engine, samples: int, repeats: int):
+    """Time each query with its composite index, then with only the single-column index"""
+    with engine.connect() as connection:
+        user_ids = [
+            row[0] for row in connection.execute(
+                text("SELECT DISTINCT user_id FROM mcp_events LIMIT :n"), {"n": samples}
+            )
+        ]
+    if not user_ids:
+        print("No events found; run with --seed-users first")
+        return
+
+    for name, (query, index, column) in CASES.items():
+        table = "mcp_events" if "mcp_events" in query.text else "quests"
+        print("\n" + "=" * 60)
+        print(name.upper())
+        print("=" * 60)
+
+        with engine.connect() as connection:
+            p50, p95 = time_query(connection, query, user_ids, repeats)
+            print(f"composite index   p50 {p50:7.3f} ms   p95 {p95:7.3f} ms   {plan(connection, query, user_ids[0])}")
+
+        # Swap indexes inside a transaction that is rolled back, leaving the schema untouched
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            connection.execute(text(f"DROP INDEX {index}"))
+            connection.execute(text(f"CREATE INDEX bench_{table}_{column} ON {table} ({column})"))
+            p50_old, p95_old = time_query(connection, query, user_ids, repeats)
+            print(f"{column} index only  p50 {p50_old:7.3f} ms   p95 {p95_old:7.3f} ms   "
+                  f"{plan(connection, query, user_ids[0])}")
+            transaction.rollback()
+
+        print(f"speed-up (p50): {p50_old / p50:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed-users", type=int, default=0, help="Insert this many synthetic users first")
+    parser.add_argument("--events-per-user", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=50, help="Distinct users to query")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = scratch_engine()
+    if not check_schema(engine):
+        sys.exit(1)
+    if args.seed_users:
+        seed(engine, args.seed_users, args.events_per_user)
+    benchmark(engine, args.samples, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Economy Management Agent - Simulation History Store
+Fixed-capacity ring buffer of simulation summaries with Redis spill-over
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+HISTORY_SPILL_KEY = "economy:simulation_history"
+HISTORY_SEQ_KEY = "economy:simulation_history:seq"
+MAX_FORECAST_DAYS = 365
+
+HISTORY_DTYPE = np.dtype([
+    ('seq', 'i8'),
+    ('timestamp', 'datetime64[us]'),
+    ('predicted_inflation', 'f8'),
+    ('standard_error', 'f8'),
+    ('inflation_std', 'f8'),
+    ('confidence_interval_95', 'f8'),
+    ('confidence_interval_5', 'f8'),
+    ('mean_final_supply', 'f8'),
+    ('current_supply', 'f8'),
+    ('forecast_days', 'i4'),
+    ('iterations', 'i4'),
+    ('engine', 'U16'),
+    ('variance_reduction', 'U16'),
+    ('seed', 'U40'),
+])
+
+
+class SimulationHistory:
+    """
+    Ring buffer of the most recent simulation results
+
+    Scalars live in one structured array and mean supply paths in a float32
+    matrix, so memory is fixed at construction. Entries pushed out of the
+    ring are written to a Redis sorted set scored by sequence number, which
+    page() merges with the ring. Sequence numbers come from a Redis counter
+    shared by every replica, so spilled entries from different processes
+    never share a score.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        redis_client=None,
+        spill_limit: Optional[int] = None
+    ):
+        self.capacity = capacity or int(os.getenv("SIMULATION_HISTORY_CAPACITY", "1000"))
+        self.spill_limit = spill_limit or int(os.getenv("SIMULATION_HISTORY_SPILL_LIMIT", "100000"))
+        self.redis = redis_client
+        self._records = np.zeros(self.capacity, dtype=HISTORY_DTYPE)
+        self._paths = np.zeros((self.capacity, MAX_FORECAST_DAYS + 1), dtype=np.float32)
+        self._appended = 0
+        self._next_local_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._appended, self.capacity)
+
+    def _allocate_seq(self) -> int:
+        # Falls back to a local counter while Redis is unreachable (or absent)
+        if self.redis is not None:
+            try:
+                seq = int(self.redis.incr(HISTORY_SEQ_KEY)) - 1
+                self._next_local_seq = max(self._next_local_seq, seq + 1)
+                return seq
+            except Exception as e:
+                print(f"Redis history sequence warning: {e}")
+        seq = self._next_local_seq
+        self._next_local_seq += 1
+        return seq
+
+    def _slots(self) -> List[int]:
+        """Ring slots holding entries, oldest first"""
+        return [seq % self.capacity for seq in range(self._appended - len(self), self._appended)]
+
+    def append(self, result: Dict) -> int:
+        """Record a simulation result and return its sequence number"""
+        with self._lock:
+            seq = self._allocate_seq()
+            slot = self._appended % self.capacity
+            evicted = self._entry(slot) if self._appended >= self.capacity else None
+
+            record = self._records[slot]
+            record['seq'] = seq
+            record['timestamp'] = np.datetime64(result['timestamp'])
+            for field in HISTORY_DTYPE.names[2:]:
+                if field == 'seed':
+                    record[field] = str(result.get(field, ''))
+                else:
+                    record[field] = result[field]
+
+            path = result['avg_supply_path']
+            self._paths[slot, :len(path)] = path
+            self._appended += 1
+
+        if evicted is not None:
+            self._spill(evicted)
+
+        return seq
+
+    def resume(self):
+        """
+        Continue sequence numbers after the newest spilled entry (call once at startup)
+
+        Seeds the shared counter when it is missing but spilled entries exist.
+        """
+        if self.redis is None:
+            return
+        try:
+            newest = self.redis.zrevrange(HISTORY_SPILL_KEY, 0, 0, withscores=True)
+            if newest:
+                self.redis.set(HISTORY_SEQ_KEY, int(newest[0][1]) + 1, nx=True)
+                with self._lock:
+                    self._next_local_seq = max(self._next_local_seq, int(newest[0][1]) + 1)
+        except Exception as e:
+            print(f"Redis history resume warning: {e}")
+
+    def flush(self):
+        """Spill every in-memory entry so a restarted process can page through them"""
+        with self._lock:
+            entries = [self._entry(slot) for slot in self._slots()]
+        for entry in entries:
+            self._spill(entry)
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent entry, or None when empty"""
+        with self._lock:
+            if not self._appended:
+                return None
+            return self._entry((self._appended - 1) % self.capacity)
+
+    def page(self, limit: int = 10, cursor: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Return up to `limit` entries with seq < cursor, oldest first
+
+        Omitting the cursor starts from the newest entry. Entries in this
+        process's ring are merged with the spilled entries of every replica
+        by sequence number. The returned next_cursor fetches the page before
+        this one, or is None at the start.
+        """
+        with self._lock:
+            entries = [
+                self._entry(slot) for slot in self._slots()
+                if cursor is None or self._records[slot]['seq'] < cursor
+            ][-limit:]
+
+        if self.redis is not None:
+            by_seq = {entry['seq']: entry for entry in self._read_spilled(cursor, limit)}
+            by_seq.update((entry['seq'], entry) for entry in entries)
+            entries = [by_seq[seq] for seq in sorted(by_seq)][-limit:]
+
+        next_cursor = entries[0]['seq'] if len(entries) == limit and entries[0]['seq'] > 0 else None
+        return entries, next_cursor
+
+    def _entry(self, slot: int) -> Dict:
+        record = self._records[slot]
+        entry = {field: record[field].item() for field in HISTORY_DTYPE.names}
+        entry['timestamp'] = str(record['timestamp'])
+        entry['seed'] = int(entry['seed']) if entry['seed'] else None
+        entry['avg_supply_path'] = self._paths[slot, :entry['forecast_days'] + 1].tolist()
+        return entry
+
+    def _spill(self, entry: Dict):
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            pipe.zadd(HISTORY_SPILL_KEY, {json.dumps(entry): entry['seq']})
+            pipe.zremrangebyrank(HISTORY_SPILL_KEY, 0, -(self.spill_limit + 1))
+            pipe.execute()
+        except Exception as e:
+            print(f"Redis history spill warning: {e}")
+
+    def _read_spilled(self, upper: Optional[int], limit: int) -> List[Dict]:
+        if self.redis is None:
+            return []
+        try:
+            payloads = self.redis.zrevrangebyscore(
+                HISTORY_SPILL_KEY, "+inf" if upper is None else f"({upper}", "-inf", start=0, num=limit
+            )
+        except Exception as e:
+            print(f"Redis history read warning: {e}")
+            return []
+        return [json.loads(payload) for payload in reversed(payloads)]
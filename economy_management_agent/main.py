@@ -2,16 +2,25 @@
 Economy Management Agent - FastAPI Microservice
 Manages tokenomics and emission rates using Monte Carlo simulation
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Optional, Literal, Union
+import asyncio
+import functools
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database import redis_client
+from shared.database import redis_client, async_redis_client, async_redis_blocking_client
 from simulation_engine import EconomySimulator
+from parallel_executor import ScenarioExecutor
+from simulation_dispatcher import SimulationDispatcher, SimulationQueueFull
+from simulation_jobs import SimulationJobStore
+from result_cache import SimulationResultCache
+from history_store import MAX_FORECAST_DAYS, SimulationHistory
+from rate_store import EmissionRateStore
 
 app = FastAPI(
     title="Economy Management Agent",
@@ -21,16 +30,42 @@ app = FastAPI(
 
 economy_simulator = EconomySimulator(
     base_xp_to_gami_rate=1000.0,
-    deflation_adjustment=0.10
+    deflation_adjustment=0.10,
+    result_cache=SimulationResultCache(redis_client),
+    history=SimulationHistory(redis_client=redis_client)
 )
 
+scenario_executor = ScenarioExecutor()
+simulation_dispatcher = SimulationDispatcher()
+simulation_jobs = SimulationJobStore(redis_client, async_redis_client)
+rate_store = EmissionRateStore(async_redis_client, economy_simulator, async_redis_blocking_client)
+
+MAX_BATCH_CONVERSIONS = int(os.getenv("MAX_BATCH_CONVERSIONS", "10000"))
+
 
 class SimulationRequest(BaseModel):
     """Request model for running simulations"""
     current_supply: float = Field(..., gt=0, description="Current $GAMI supply")
     adoption_rate: float = Field(..., ge=0, le=100, description="Daily adoption rate %")
-    days: int = Field(default=30, ge=1, le=365, description="Forecast period")
+    days: int = Field(default=30, ge=1, le=MAX_FORECAST_DAYS, description="Forecast period")
     iterations: int = Field(default=1000, ge=100, le=10000, description="Simulation iterations")
+    engine: Literal["vectorized", "loop"] = Field(default="vectorized", description="Simulation engine")
+    seed: Optional[int] = Field(default=None, ge=0, description="RNG seed for a reproducible run")
+    variance_reduction: Literal["none", "antithetic", "control_variate", "sobol"] = Field(
+        default="none", description="Variance-reduction technique for the estimate"
+    )
+    tolerance: Optional[float] = Field(
+        default=None, gt=0, description="Stop once the 95% CI half-width on inflation (% points) is this small"
+    )
+    time_budget_seconds: Optional[float] = Field(
+        default=None, gt=0, le=300, description="Stop adaptive runs after this many seconds"
+    )
+    
+    @model_validator(mode="after")
+    def check_engine_sampling(self):
+        if self.engine == "loop" and self.variance_reduction in ("antithetic", "sobol"):
+            raise ValueError(f"variance_reduction '{self.variance_reduction}' requires the vectorized engine")
+        return self
 
 
 class ConversionRequest(BaseModel):
@@ -38,49 +73,160 @@ class ConversionRequest(BaseModel):
     xp_amount: int = Field(..., gt=0, description="XP amount to convert")
 
 
+class WalletConversion(BaseModel):
+    """One wallet's payout in a batch conversion"""
+    wallet_id: str = Field(..., min_length=1, description="Wallet receiving the payout")
+    xp_amount: int = Field(..., gt=0, description="XP amount to convert")
+
+
+class BatchConversionRequest(BaseModel):
+    """Request for converting many XP amounts at one rate"""
+    conversions: List[Union[Annotated[int, Field(gt=0)], WalletConversion]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_CONVERSIONS,
+        description="XP amounts, or wallet_id/xp_amount pairs"
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize economy state on startup"""
+    await rate_store.start()
     try:
-        redis_client.set("economy:xp_to_gami_rate", economy_simulator.get_current_emission_rate())
-        redis_client.set("economy:last_simulation", "")
+        await async_redis_client.set("economy:last_simulation", "")
+        economy_simulator.simulation_history.resume()
         print("Economy Management Agent initialized")
     except Exception as e:
         print(f"Redis initialization warning: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop simulation workers and persist in-memory history"""
+    await rate_store.stop()
+    simulation_dispatcher.shutdown()
+    scenario_executor.shutdown()
+    economy_simulator.simulation_history.flush()
+
+
+async def apply_simulation_result(result: dict) -> dict:
+    """
+    Feed a finished simulation into the emission controller and build the response
+    A new rate takes effect only once the shared rate store has assigned its version;
+    if that write fails the rate is left unchanged and rate_applied is false
+    """
+    decision = economy_simulator.adjust_emission_rate(result, apply=False)
+    decision['rate_applied'] = False
+    
+    if decision['trigger_deflationary_protocol']:
+        try:
+            decision['rate_version'] = await rate_store.set_rate(decision['new_rate'])
+            decision['rate_applied'] = True
+        except Exception as e:
+            print(f"Redis rate update warning: {e}")
+    
+    try:
+        await async_redis_client.set("economy:last_simulation", str(result))
+    except Exception as e:
+        print(f"Redis cache warning: {e}")
+    
+    return {
+        "simulation_result": result,
+        "adjustment_decision": decision,
+        "current_emission_rate": economy_simulator.get_current_emission_rate()
+    }
+
+
+def run_simulation_job(job_id: str, **simulation_kwargs) -> dict:
+    """Worker-thread entry point for an asynchronous job: flag it running, then simulate"""
+    simulation_jobs.mark_running(job_id)
+    return economy_simulator.run_monte_carlo_simulation(
+        progress_callback=functools.partial(simulation_jobs.update_progress, job_id),
+        **simulation_kwargs
+    )
+
+
+async def complete_simulation_job(job_id: str, simulation: asyncio.Future):
+    """Background task: wait for a queued simulation and store its outcome on the job"""
+    try:
+        result = await simulation
+        await simulation_jobs.complete(job_id, await apply_simulation_result(result))
+    except Exception as e:
+        try:
+            await simulation_jobs.fail(job_id, str(e))
+        except Exception as redis_error:
+            print(f"Simulation job {job_id} failed ({e}) and could not be recorded: {redis_error}")
+
+
 @app.post("/run-simulation")
-async def run_simulation(request: SimulationRequest, background_tasks: BackgroundTasks):
+async def run_simulation(
+    request: SimulationRequest,
+    background_tasks: BackgroundTasks,
+    run_async: bool = Query(default=False, alias="async", description="Return a job ID instead of waiting")
+):
     """
     Run Monte Carlo simulation to forecast inflation
     Automatically triggers deflationary protocol if inflation > 5%
+    Runs on the simulation worker pool; returns 429 when the pool is saturated
+    With async=true, returns 202 with a job ID to poll at /simulation-jobs/{job_id}
     """
+    job_id = None
     try:
-        result = economy_simulator.run_monte_carlo_simulation(
+        simulation_kwargs = dict(
             current_supply=request.current_supply,
             adoption_rate=request.adoption_rate,
             days=request.days,
-            iterations=request.iterations
+            iterations=request.iterations,
+            engine=request.engine,
+            seed=request.seed,
+            variance_reduction=request.variance_reduction,
+            tolerance=request.tolerance,
+            time_budget=request.time_budget_seconds,
+            executor=scenario_executor
         )
         
-        decision = economy_simulator.adjust_emission_rate(result)
+        if run_async:
+            job_id = await simulation_jobs.create(request.model_dump(mode="json"))
+            simulation = simulation_dispatcher.submit(run_simulation_job, job_id, **simulation_kwargs)
+            background_tasks.add_task(complete_simulation_job, job_id, simulation)
+            
+            return JSONResponse(status_code=202, content={
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/simulation-jobs/{job_id}"
+            })
         
-        try:
-            redis_client.set("economy:xp_to_gami_rate", economy_simulator.get_current_emission_rate())
-            redis_client.set("economy:last_simulation", str(result))
-        except Exception as e:
-            print(f"Redis cache warning: {e}")
+        result = await simulation_dispatcher.submit(
+            economy_simulator.run_monte_carlo_simulation,
+            **simulation_kwargs
+        )
         
-        return {
-            "simulation_result": result,
-            "adjustment_decision": decision,
-            "current_emission_rate": economy_simulator.get_current_emission_rate()
-        }
+        return await apply_simulation_result(result)
         
+    except SimulationQueueFull as e:
+        if job_id:
+            await simulation_jobs.fail(job_id, str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
 
+@app.get("/simulation-jobs/{job_id}")
+async def get_simulation_job(job_id: str):
+    """
+    Poll an asynchronous simulation job
+    Reports status (queued/running/completed/failed), progress and, when done, the result
+    """
+    try:
+        job = await simulation_jobs.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job lookup failed: {str(e)}")
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Simulation job not found")
+    
+    return job
+
+
 @app.get("/get-current-emission-rate")
 async def get_current_emission_rate():
     """
@@ -88,17 +234,11 @@ async def get_current_emission_rate():
     Called by Reward Orchestrator before minting tokens
     """
     try:
-        rate = economy_simulator.get_current_emission_rate()
-        
-        try:
-            cached_rate = redis_client.get("economy:xp_to_gami_rate")
-            if cached_rate:
-                rate = float(cached_rate)
-        except Exception as e:
-            print(f"Redis read warning: {e}")
+        rate, rate_version = economy_simulator.get_rate_snapshot()
         
         return {
             "xp_to_gami_rate": rate,
+            "rate_version": rate_version,
             "description": f"1 GAMI = {rate} XP",
             "inverse_rate": round(1 / rate, 6) if rate > 0 else 0
         }
@@ -114,34 +254,80 @@ async def convert_xp_to_gami(request: ConversionRequest):
     Uses current emission rate
     """
     try:
-        gami_amount = economy_simulator.calculate_gami_amount(request.xp_amount)
+        gami_amounts, rate, rate_version = economy_simulator.calculate_gami_amounts([request.xp_amount])
+        latest_simulation = economy_simulator.simulation_history.latest()
         
         return {
             "xp_amount": request.xp_amount,
-            "gami_amount": gami_amount,
-            "conversion_rate": economy_simulator.get_current_emission_rate(),
-            "timestamp": economy_simulator.simulation_history[-1]['timestamp'] if economy_simulator.simulation_history else None
+            "gami_amount": gami_amounts[0].item(),
+            "conversion_rate": rate,
+            "rate_version": rate_version,
+            "timestamp": latest_simulation['timestamp'] if latest_simulation else None
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
 
 
+@app.post("/convert-xp-to-gami/batch")
+async def convert_xp_to_gami_batch(request: BatchConversionRequest):
+    """
+    Convert many XP amounts to GAMI in one pass
+    Every amount uses the same rate snapshot, identified by rate_version
+    """
+    try:
+        wallet_ids = [
+            item.wallet_id if isinstance(item, WalletConversion) else None
+            for item in request.conversions
+        ]
+        xp_amounts = [
+            item.xp_amount if isinstance(item, WalletConversion) else item
+            for item in request.conversions
+        ]
+        
+        gami_amounts, rate, rate_version = economy_simulator.calculate_gami_amounts(xp_amounts)
+        
+        conversions = []
+        for wallet_id, xp_amount, gami_amount in zip(wallet_ids, xp_amounts, gami_amounts.tolist()):
+            conversion = {"wallet_id": wallet_id} if wallet_id is not None else {}
+            conversion.update(xp_amount=xp_amount, gami_amount=gami_amount)
+            conversions.append(conversion)
+        
+        return {
+            "conversions": conversions,
+            "count": len(conversions),
+            "total_xp": sum(xp_amounts),
+            "total_gami": round(float(gami_amounts.sum()), 6),
+            "conversion_rate": rate,
+            "rate_version": rate_version
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch conversion failed: {str(e)}")
+
+
 @app.post("/forecast-scenarios")
 async def forecast_scenarios(
     current_supply: float,
     adoption_rates: List[float] = [1.0, 3.0, 5.0, 10.0],
-    days_per_scenario: int = 30
+    days_per_scenario: int = Query(default=30, ge=1, le=MAX_FORECAST_DAYS),
+    seed: Optional[int] = None,
+    variance_reduction: Literal["none", "antithetic", "control_variate", "sobol"] = "none"
 ):
     """
     Run multiple forecast scenarios with different adoption rates
     Useful for strategic planning
+    Runs on the simulation worker pool; returns 429 when the pool is saturated
     """
     try:
-        scenarios = economy_simulator.forecast_supply_curve(
+        scenarios = await simulation_dispatcher.submit(
+            economy_simulator.forecast_supply_curve,
             current_supply=current_supply,
             adoption_rates=adoption_rates,
-            days_per_scenario=days_per_scenario
+            days_per_scenario=days_per_scenario,
+            seed=seed,
+            variance_reduction=variance_reduction,
+            executor=scenario_executor
         )
         
         return {
@@ -149,16 +335,27 @@ async def forecast_scenarios(
             "current_emission_rate": economy_simulator.get_current_emission_rate()
         }
         
+    except SimulationQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scenario forecasting failed: {str(e)}")
 
 
 @app.get("/simulation-history")
-async def get_simulation_history(limit: int = 10):
-    """Retrieve recent simulation history"""
+async def get_simulation_history(
+    limit: int = Query(default=10, ge=1, le=500),
+    cursor: Optional[int] = Query(default=None, ge=0)
+):
+    """
+    Retrieve simulation history, oldest first
+    Pass next_cursor back as cursor to page further into the past
+    """
     try:
-        history = economy_simulator.get_simulation_history(limit=limit)
-        return {"history": history, "count": len(history)}
+        # Older pages come from the Redis spill set through the sync client
+        history, next_cursor = await asyncio.to_thread(
+            economy_simulator.get_simulation_history, limit=limit, cursor=cursor
+        )
+        return {"history": history, "count": len(history), "next_cursor": next_cursor}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"History retrieval failed: {str(e)}")
@@ -169,20 +366,18 @@ async def manual_rate_adjustment(new_rate: float):
     """
     Manual override for emission rate (admin only)
     Use with caution
+    Fails without changing the rate when the shared rate store cannot be updated
     """
     try:
         old_rate = economy_simulator.get_current_emission_rate()
-        economy_simulator.current_xp_to_gami_rate = new_rate
         
-        try:
-            redis_client.set("economy:xp_to_gami_rate", new_rate)
-        except Exception as e:
-            print(f"Redis update warning: {e}")
+        rate_version = await rate_store.set_rate(new_rate)
         
         return {
             "status": "success",
             "old_rate": old_rate,
             "new_rate": new_rate,
+            "rate_version": rate_version,
             "change_percentage": ((new_rate - old_rate) / old_rate) * 100
         }
         
@@ -196,7 +391,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "economy_management_agent",
-        "current_rate": economy_simulator.get_current_emission_rate()
+        "current_rate": economy_simulator.get_current_emission_rate(),
+        "simulations_pending": simulation_dispatcher.pending
     }
 
 
@@ -0,0 +1,104 @@
+"""
+Economy Management Agent - Parallel Scenario Executor
+Spreads Monte Carlo chunks across a process pool sized to the container CPU quota
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Any
+
+# Workers yield the CPU to the service process when they share a core
+WORKER_NICENESS = int(os.getenv("SIMULATION_WORKER_NICE", "10"))
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs this process may actually use
+
+    Honours the cgroup CPU quota (v2 cpu.max, then v1 cfs quota) so a
+    container limited to 2 CPUs on a 32-core host gets 2 workers, not 32.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            max_value, period = f.read().split()[:2]
+            if max_value != "max":
+                quota = int(max_value) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota_us = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period_us = int(f.read())
+            if quota_us > 0 and period_us > 0:
+                quota = quota_us / period_us
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+
+    return max(1, cpus)
+
+
+class ScenarioExecutor:
+    """
+    Lazily started process pool for simulation chunks
+
+    Workers use the "spawn" start method: the service process runs an event
+    loop and helper threads, which are not safe to fork. Tasks always run
+    in worker processes, even with a single worker, so a pure-Python
+    engine never holds the service process's GIL against the event loop.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("SIMULATION_WORKERS", "0")) or available_cpus()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Dispatcher threads may start the pool concurrently
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=os.nice,
+                    initargs=(WORKER_NICENESS,)
+                )
+            return self._pool
+
+    def run(
+        self,
+        fn: Callable,
+        tasks: List[tuple],
+        on_task_done: Optional[Callable[[int], None]] = None
+    ) -> List[Any]:
+        """
+        Run fn(*task) for every task across the pool, returning results in task order
+
+        on_task_done, if given, is called in the calling thread with the index
+        of each task as it finishes.
+        """
+        pool = self._get_pool()
+        futures = {pool.submit(fn, *task): index for index, task in enumerate(tasks)}
+        results = [None] * len(tasks)
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if on_task_done:
+                on_task_done(index)
+        return results
+
+    def shutdown(self):
+        """Stop worker processes"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
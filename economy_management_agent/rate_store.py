@@ -0,0 +1,119 @@
+"""
+Economy Management Agent - Shared Emission Rate
+Versioned XP-to-GAMI rate record in Redis, mirrored into each replica over pub/sub
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from simulation_engine import EconomySimulator
+
+RATE_KEY = "economy:emission_rate"
+RATE_CHANNEL = "economy:emission_rate:updates"
+LEGACY_RATE_KEY = "economy:xp_to_gami_rate"
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+class EmissionRateStore:
+    """
+    Redis hash {rate, version, updated_at} shared by every economy replica
+
+    Writers bump the version and set the rate in one MULTI, then publish the
+    new (rate, version) pair. Each replica keeps the rate in its simulator,
+    so reads never touch Redis; a listener task installs published updates
+    and reloads the hash after every (re)subscribe in case messages were
+    missed while disconnected. Older versions are ignored.
+    """
+
+    def __init__(self, redis_client, simulator: "EconomySimulator", subscriber_client=None):
+        self.redis = redis_client
+        # The subscription idles between updates for longer than the pooled
+        # socket timeout, so it needs a client without one
+        self.subscriber = subscriber_client or redis_client
+        self.simulator = simulator
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the shared rate (seeding it from the simulator if absent) and start listening"""
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Redis rate load warning: {e}")
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the listener task"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def load(self) -> int:
+        """
+        Install the rate stored in Redis
+
+        Returns:
+            The installed rate version
+        """
+        record = await self.redis.hgetall(RATE_KEY)
+        if not record:
+            rate, version = self.simulator.get_rate_snapshot()
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hsetnx(RATE_KEY, "rate", rate)
+                pipe.hsetnx(RATE_KEY, "version", version)
+                pipe.hsetnx(RATE_KEY, "updated_at", datetime.utcnow().isoformat())
+                pipe.hgetall(RATE_KEY)
+                record = (await pipe.execute())[-1]
+
+        self.simulator.set_emission_rate(float(record["rate"]), version=int(record["version"]))
+        return self.simulator.rate_version
+
+    async def set_rate(self, new_rate: float) -> int:
+        """
+        Publish a new rate to every replica
+
+        Returns:
+            The new rate version
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(RATE_KEY, "version", 1)
+            pipe.hset(RATE_KEY, mapping={"rate": new_rate, "updated_at": datetime.utcnow().isoformat()})
+            pipe.set(LEGACY_RATE_KEY, new_rate)
+            version = (await pipe.execute())[0]
+
+        self.simulator.set_emission_rate(new_rate, version=version)
+        await self.redis.publish(RATE_CHANNEL, json.dumps({"rate": new_rate, "version": version}))
+        return version
+
+    async def _listen(self):
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            pubsub = self.subscriber.pubsub()
+            try:
+                await pubsub.subscribe(RATE_CHANNEL)
+                await self.load()
+                delay = RECONNECT_DELAY_SECONDS
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    update = json.loads(message["data"])
+                    self.simulator.set_emission_rate(float(update["rate"]), version=int(update["version"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis rate subscription warning: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
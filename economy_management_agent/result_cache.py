@@ -0,0 +1,93 @@
+"""
+Economy Management Agent - Simulation Result Cache
+Content-addressed cache of simulation results: in-process LRU backed by Redis
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+CACHE_KEY_PREFIX = "economy:simulation_cache:"
+
+
+class SimulationResultCache:
+    """
+    Two-tier cache keyed by a hash of the simulation inputs
+
+    Keys cover every input that changes the outcome (inputs, seed, engine,
+    model parameters), so an entry can be shared by every replica. Values are
+    stored as JSON; each get returns a fresh copy the caller may modify.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        maxsize: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.redis = redis_client
+        self.maxsize = maxsize or int(os.getenv("SIMULATION_CACHE_SIZE", "256"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("SIMULATION_CACHE_TTL", "600"))
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, **inputs) -> str:
+        """Stable digest of the inputs, independent of argument order"""
+        payload = json.dumps({"kind": kind, **inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up the local tier, then Redis; None on miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._local.move_to_end(key)
+                    return json.loads(payload)
+                del self._local[key]
+
+        if self.redis is None:
+            return None
+
+        try:
+            payload = self.redis.get(f"{CACHE_KEY_PREFIX}{key}")
+        except Exception as e:
+            print(f"Redis cache read warning: {e}")
+            return None
+
+        if payload is None:
+            return None
+
+        self._store_local(key, payload)
+        return json.loads(payload)
+
+    def set(self, key: str, value: Dict):
+        """Store in both tiers with the configured TTL"""
+        payload = json.dumps(value)
+        self._store_local(key, payload)
+
+        if self.redis is None:
+            return
+
+        try:
+            self.redis.set(f"{CACHE_KEY_PREFIX}{key}", payload, ex=self.ttl_seconds)
+        except Exception as e:
+            print(f"Redis cache write warning: {e}")
+
+    def clear_local(self):
+        """Drop the in-process tier"""
+        with self._lock:
+            self._local.clear()
+
+    def _store_local(self, key: str, payload: str):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
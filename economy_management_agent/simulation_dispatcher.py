@@ -0,0 +1,81 @@
+"""
+Economy Management Agent - Simulation Dispatcher
+Runs CPU-bound simulations off the event loop with admission control
+"""
+import asyncio
+import functools
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class SimulationQueueFull(Exception):
+    """Raised when the dispatcher is saturated; carries a Retry-After hint in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Simulation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SimulationDispatcher:
+    """
+    Bounded worker pool for simulation calls
+
+    At most max_concurrency simulations run at once and at most
+    max_queue_depth more wait for a worker; anything beyond that is rejected
+    immediately so the event loop keeps serving rate lookups.
+    Must be used from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue_depth: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency or int(os.getenv("SIMULATION_MAX_CONCURRENCY", "2"))
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else int(
+            os.getenv("SIMULATION_QUEUE_DEPTH", "8")
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="simulation"
+        )
+        self._pending = 0
+        self._avg_duration = 1.0
+
+    @property
+    def pending(self) -> int:
+        """Simulations running or waiting for a worker"""
+        return self._pending
+
+    def retry_after(self) -> int:
+        """Estimated seconds until a slot frees up: the running average turnaround of a simulation"""
+        return max(1, math.ceil(self._avg_duration))
+
+    def submit(self, fn: Callable, *args, **kwargs) -> asyncio.Future:
+        """
+        Schedule fn(*args, **kwargs) on the worker pool
+
+        Raises:
+            SimulationQueueFull: if running + queued simulations hit the limit
+        """
+        if self._pending >= self.max_concurrency + self.max_queue_depth:
+            raise SimulationQueueFull(self.retry_after())
+
+        self._pending += 1
+        started = time.monotonic()
+
+        def _release(_future):
+            self._pending -= 1
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - started)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(_release)
+        return future
+
+    def shutdown(self):
+        """Stop accepting work and wait for running simulations"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
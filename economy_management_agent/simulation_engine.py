@@ -3,9 +3,274 @@ Economy Management Agent - Tokenomics Simulation Engine
 Controls XP to GAMI conversion rate using Monte Carlo simulation
 """
 import numpy as np
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional, Union, Callable, TYPE_CHECKING
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime, timedelta
 import json
+import math
+import secrets
+import threading
+import time
+import warnings
+
+from history_store import MAX_FORECAST_DAYS, SimulationHistory
+from streaming_stats import SupplyPathAggregator
+
+if TYPE_CHECKING:
+    from parallel_executor import ScenarioExecutor
+    from result_cache import SimulationResultCache
+
+
+BASE_DAILY_EMISSION = 0.001
+ADOPTION_VOLATILITY = 0.2
+MARKET_VOLATILITY = 0.05
+
+SeedLike = Union[int, np.random.SeedSequence, None]
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass(frozen=True, slots=True)
+class ModelParameters:
+    """Supply model coefficients shared by every simulation engine"""
+    
+    base_daily_emission: float = BASE_DAILY_EMISSION
+    adoption_volatility: float = ADOPTION_VOLATILITY
+    market_volatility: float = MARKET_VOLATILITY
+
+
+def resolve_seed_sequence(seed: SeedLike = None) -> np.random.SeedSequence:
+    """
+    Normalize a caller-provided seed into a SeedSequence
+    
+    Unseeded runs draw a fresh 63-bit seed so the run can still be replayed
+    from the seed echoed in its result.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if seed is None:
+        seed = secrets.randbits(63)
+    return np.random.SeedSequence(seed)
+
+
+def _draw_shocks(
+    rng: np.random.Generator,
+    iterations: int,
+    days: int,
+    sampling: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw standard-normal adoption shocks and U[0, 1) volatility shocks
+    
+    sampling:
+        "pseudo": independent draws from rng
+        "antithetic": half the paths mirror the other half (z -> -z, u -> 1 - u);
+            iterations must be even
+        "sobol": one scrambled Sobol sequence over all 2 * days dimensions
+    
+    Returns:
+        Tuple of two (iterations, days) arrays
+    """
+    if sampling == "antithetic":
+        half = iterations // 2
+        normal_shocks = rng.standard_normal((half, days))
+        uniform_shocks = rng.random((half, days))
+        return (
+            np.concatenate([normal_shocks, -normal_shocks]),
+            np.concatenate([uniform_shocks, 1 - uniform_shocks])
+        )
+    
+    if sampling == "sobol":
+        from scipy.stats import norm, qmc
+        
+        sampler = qmc.Sobol(d=2 * days, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            # Non power-of-two sample sizes are fine for a randomized estimate
+            warnings.simplefilter("ignore", UserWarning)
+            points = sampler.random(iterations)
+        points = np.clip(points, 1e-12, 1 - 1e-12)
+        return norm.ppf(points[:, :days]), points[:, days:]
+    
+    return rng.standard_normal((iterations, days)), rng.random((iterations, days))
+
+
+def _loop_supply_paths(
+    current_supply: float,
+    adoption_rate: float,
+    days: int,
+    iterations: int,
+    rng: np.random.Generator,
+    params: ModelParameters = ModelParameters(),
+    sampling: str = "pseudo"
+) -> np.ndarray:
+    """
+    Reference engine: step every path one day at a time
+    
+    Returns:
+        Array of shape (iterations, days + 1) with the supply at each day
+    """
+    if sampling != "pseudo":
+        raise ValueError(f"The loop engine only supports pseudo-random sampling, not '{sampling}'")
+    
+    paths = np.empty((iterations, days + 1))
+    
+    for i in range(iterations):
+        supply = current_supply
+        paths[i, 0] = supply
+        
+        for day in range(days):
+            daily_adoption = rng.normal(adoption_rate, adoption_rate * params.adoption_volatility)
+            daily_adoption = max(0, daily_adoption)
+            
+            base_daily_emission = supply * params.base_daily_emission
+            
+            adoption_factor = 1 + (daily_adoption / 100)
+            daily_emission = base_daily_emission * adoption_factor
+            
+            market_volatility = rng.uniform(-params.market_volatility, params.market_volatility)
+            daily_emission *= (1 + market_volatility)
+            
+            supply += daily_emission
+            paths[i, day + 1] = supply
+    
+    return paths
+
+
+def _vectorized_supply_paths(
+    current_supply: float,
+    adoption_rate: float,
+    days: int,
+    iterations: int,
+    rng: np.random.Generator,
+    params: ModelParameters = ModelParameters(),
+    sampling: str = "pseudo"
+) -> np.ndarray:
+    """
+    Vectorized engine: draw every shock up front and compound them
+    
+    Each day multiplies supply by 1 + 0.1% * adoption_factor * (1 + volatility),
+    so the whole recurrence is a cumulative product over the day axis.
+    
+    Returns:
+        Array of shape (iterations, days + 1) with the supply at each day
+    """
+    normal_shocks, uniform_shocks = _draw_shocks(rng, iterations, days, sampling)
+    
+    daily_adoption = adoption_rate + adoption_rate * params.adoption_volatility * normal_shocks
+    np.maximum(daily_adoption, 0, out=daily_adoption)
+    
+    market_volatility = -params.market_volatility + 2 * params.market_volatility * uniform_shocks
+    
+    growth = 1 + params.base_daily_emission * (1 + daily_adoption / 100) * (1 + market_volatility)
+    
+    paths = np.empty((iterations, days + 1))
+    paths[:, 0] = current_supply
+    np.cumprod(growth, axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= current_supply
+    
+    return paths
+
+
+SIMULATION_ENGINES = {
+    "loop": _loop_supply_paths,
+    "vectorized": _vectorized_supply_paths,
+}
+
+CHUNK_ITERATIONS = 500
+SOBOL_REPLICATES = 8
+CONFIDENCE_Z = 1.96
+MIN_ADAPTIVE_CHUNKS = 2
+
+VARIANCE_REDUCTION_MODES = ("none", "antithetic", "control_variate", "sobol")
+
+
+@dataclass(slots=True)
+class SimulationChunk:
+    """Partial result for one slice of iterations, small enough to ship between processes"""
+    
+    final_supplies: np.ndarray
+    path_summary: SupplyPathAggregator
+    controls: Optional[np.ndarray] = None
+
+
+def simulate_chunk(
+    current_supply: float,
+    adoption_rate: float,
+    days: int,
+    iterations: int,
+    engine: str,
+    params: ModelParameters,
+    seed_sequence: np.random.SeedSequence,
+    variance_reduction: str = "none"
+) -> SimulationChunk:
+    """
+    Simulate one chunk of iterations on its own RNG stream
+    
+    Module-level so it can be pickled into ProcessPoolExecutor workers.
+    For control variates the chunk also returns each path's summed daily
+    emission rate, whose expectation is known in closed form.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    sampling = variance_reduction if variance_reduction in ("antithetic", "sobol") else "pseudo"
+    paths = SIMULATION_ENGINES[engine](current_supply, adoption_rate, days, iterations, rng, params, sampling)
+    
+    path_summary = SupplyPathAggregator(days)
+    path_summary.update(paths)
+    
+    controls = None
+    if variance_reduction == "control_variate":
+        controls = (paths[:, 1:] / paths[:, :-1] - 1).sum(axis=1)
+    
+    return SimulationChunk(final_supplies=paths[:, -1].copy(), path_summary=path_summary, controls=controls)
+
+
+def expected_emission_control(adoption_rate: float, days: int, params: ModelParameters) -> float:
+    """
+    Exact mean of the control variate: the summed daily emission rate
+    
+    Each day emits 0.1% * (1 + max(0, A) / 100) * (1 + V) of supply with
+    A ~ N(rate, (rate * adoption_volatility)^2) and E[V] = 0, so only the
+    truncated-normal mean of A is needed.
+    """
+    sigma = adoption_rate * params.adoption_volatility
+    if sigma > 0:
+        ratio = adoption_rate / sigma
+        cdf = 0.5 * (1 + math.erf(ratio / math.sqrt(2)))
+        pdf = math.exp(-ratio ** 2 / 2) / math.sqrt(2 * math.pi)
+        expected_adoption = adoption_rate * cdf + sigma * pdf
+    else:
+        expected_adoption = max(adoption_rate, 0.0)
+    return days * params.base_daily_emission * (1 + expected_adoption / 100)
+
+
+def split_iterations(
+    iterations: int,
+    chunk_iterations: int = CHUNK_ITERATIONS,
+    min_chunks: int = 1,
+    even: bool = False
+) -> List[int]:
+    """
+    Split an iteration count into chunks
+    
+    Normally fixed-size chunks (the last one may be smaller). min_chunks
+    forces at least that many near-equal chunks; even rounds each chunk up
+    to an even size for antithetic pairs.
+    """
+    if iterations // chunk_iterations < min_chunks:
+        base, extra = divmod(iterations, min_chunks)
+        sizes = [base + 1] * extra + [base] * (min_chunks - extra)
+    else:
+        full, remainder = divmod(iterations, chunk_iterations)
+        sizes = [chunk_iterations] * full + ([remainder] if remainder else [])
+    if even:
+        sizes = [size + size % 2 for size in sizes]
+    return [size for size in sizes if size > 0]
+
+
+def seed_fingerprint(seed: SeedLike):
+    """JSON-friendly identity of a seed for cache keys (None stays None)"""
+    if isinstance(seed, np.random.SeedSequence):
+        return [seed.entropy, list(seed.spawn_key)]
+    return seed
 
 
 class EconomySimulator:
@@ -17,87 +282,351 @@ class EconomySimulator:
     def __init__(
         self,
         base_xp_to_gami_rate: float = 1000.0,
-        deflation_adjustment: float = 0.10
+        deflation_adjustment: float = 0.10,
+        model_parameters: Optional[ModelParameters] = None,
+        result_cache: Optional["SimulationResultCache"] = None,
+        history: Optional[SimulationHistory] = None
     ):
         self.base_xp_to_gami_rate = base_xp_to_gami_rate
         self.current_xp_to_gami_rate = base_xp_to_gami_rate
+        self.rate_version = 0
+        self._rate_lock = threading.Lock()
         self.deflation_adjustment = deflation_adjustment
-        self.simulation_history = []
+        self.model_parameters = model_parameters or ModelParameters()
+        self.result_cache = result_cache
+        self.simulation_history = history if history is not None else SimulationHistory()
         
     def run_monte_carlo_simulation(
         self,
         current_supply: float,
         adoption_rate: float,
         days: int = 30,
-        iterations: int = 1000
+        iterations: int = 1000,
+        engine: str = "vectorized",
+        seed: SeedLike = None,
+        executor: Optional["ScenarioExecutor"] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        variance_reduction: str = "none",
+        tolerance: Optional[float] = None,
+        time_budget: Optional[float] = None
     ) -> Dict:
         """
         Run Monte Carlo simulation to forecast inflation
         
+        With tolerance or time_budget set the run is adaptive: chunks are
+        simulated in rounds until the 95% confidence half-width on
+        predicted_inflation is at most tolerance, time_budget seconds have
+        passed, or `iterations` is reached. Convergence is checked chunk by
+        chunk in seed order, so seeded tolerance-only runs stop at the same
+        iteration count regardless of worker count.
+        
         Args:
             current_supply: Current $GAMI token supply
             adoption_rate: Daily user adoption rate (percentage)
             days: Forecast period in days
-            iterations: Number of simulation runs
+            iterations: Number of simulation runs (the upper bound in adaptive mode)
+            engine: "vectorized" (array-at-once) or "loop" (reference per-step implementation)
+            seed: Integer seed or SeedSequence; runs with the same seed and engine are identical
+            executor: Optional ScenarioExecutor to spread iteration chunks across processes
+            progress_callback: Called with (completed_iterations, iterations) after each chunk
+            variance_reduction: "none", "antithetic", "control_variate" or "sobol" (quasi-Monte Carlo)
+            tolerance: Target 95% confidence half-width on predicted_inflation, in percentage points
+            time_budget: Wall-clock limit in seconds for an adaptive run
             
         Returns:
-            Dict with predicted inflation, supply forecast, and statistics
+            Dict with predicted inflation, its standard error, supply forecast and statistics;
+            iterations is the count actually simulated and stopping_reason says why an
+            adaptive run ended (None for fixed runs); cache_hit is True when an identical
+            earlier run was reused
+        """
+        cache_key = self._cache_key(
+            "monte_carlo",
+            current_supply=current_supply,
+            adoption_rate=adoption_rate,
+            days=days,
+            iterations=iterations,
+            engine=engine,
+            variance_reduction=variance_reduction,
+            tolerance=tolerance,
+            time_budget=time_budget,
+            seed=seed
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            cached['cache_hit'] = True
+            if progress_callback:
+                progress_callback(iterations, iterations)
+            return cached
+        
+        seed_sequence = resolve_seed_sequence(seed)
+        tasks = self._chunk_tasks(
+            current_supply, adoption_rate, days, iterations, engine, seed_sequence, variance_reduction
+        )
+        
+        if tolerance is None and time_budget is None:
+            chunks = self._run_chunks(tasks, executor, progress_callback)
+            stopping_reason = None
+        else:
+            def _standard_error(partial: List[SimulationChunk]) -> float:
+                final_supplies = np.concatenate([chunk.final_supplies for chunk in partial])
+                inflations = ((final_supplies - current_supply) / current_supply) * 100
+                return self._estimate_inflation(
+                    partial, inflations, current_supply, adoption_rate, days, variance_reduction
+                )[1]
+            
+            chunks, stopping_reason = self._run_adaptive(
+                tasks, executor, progress_callback, _standard_error, tolerance, time_budget,
+                # Sobol errors come from the spread of replicate means; fewer than
+                # SOBOL_REPLICATES of them give no usable interval
+                min_chunks=SOBOL_REPLICATES if variance_reduction == "sobol" else MIN_ADAPTIVE_CHUNKS
+            )
+        
+        simulation_result = self._summarize_chunks(
+            chunks, current_supply, adoption_rate, days, engine, variance_reduction, seed_sequence
+        )
+        simulation_result['stopping_reason'] = stopping_reason
+        simulation_result['cache_hit'] = False
+        
+        self.simulation_history.append(simulation_result)
+        self._cache_set(cache_key, simulation_result)
+        
+        return simulation_result
+    
+    def update_model_parameters(self, **changes) -> ModelParameters:
+        """
+        Change supply model coefficients
+        
+        Cache keys include the parameters, so results computed under the old
+        model are never served again; the local cache tier is dropped as well.
+        """
+        self.model_parameters = replace(self.model_parameters, **changes)
+        if self.result_cache is not None:
+            self.result_cache.clear_local()
+        return self.model_parameters
+    
+    def _cache_key(self, kind: str, seed: SeedLike, **inputs) -> Optional[str]:
+        if self.result_cache is None:
+            return None
+        return self.result_cache.make_key(
+            kind,
+            seed=seed_fingerprint(seed),
+            model=asdict(self.model_parameters),
+            chunk_iterations=CHUNK_ITERATIONS,
+            **inputs
+        )
+    
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[Dict]:
+        if cache_key is None:
+            return None
+        return self.result_cache.get(cache_key)
+    
+    def _cache_set(self, cache_key: Optional[str], value: Dict):
+        if cache_key is not None:
+            self.result_cache.set(cache_key, value)
+    
+    def _chunk_tasks(
+        self,
+        current_supply: float,
+        adoption_rate: float,
+        days: int,
+        iterations: int,
+        engine: str,
+        seed_sequence: np.random.SeedSequence,
+        variance_reduction: str = "none"
+    ) -> List[tuple]:
+        """
+        Build simulate_chunk argument tuples for one scenario
+        
+        Chunking depends only on the iteration count and each chunk gets a
+        spawned child stream, so a seeded run gives the same result whether
+        the chunks run serially or across a process pool.
+        """
+        if engine not in SIMULATION_ENGINES:
+            raise ValueError(
+                f"Unknown simulation engine '{engine}' (expected one of {sorted(SIMULATION_ENGINES)})"
+            )
+        
+        if not 1 <= days <= MAX_FORECAST_DAYS:
+            # History keeps supply paths in fixed-width rows
+            raise ValueError(f"Forecast period must be between 1 and {MAX_FORECAST_DAYS} days")
+        
+        if variance_reduction not in VARIANCE_REDUCTION_MODES:
+            raise ValueError(
+                f"Unknown variance reduction '{variance_reduction}' (expected one of {VARIANCE_REDUCTION_MODES})"
+            )
+        if engine == "loop" and variance_reduction in ("antithetic", "sobol"):
+            raise ValueError(f"'{variance_reduction}' sampling requires the vectorized engine")
+        
+        # Sobol chunks are independent scrambles; their spread gives the standard error
+        chunk_sizes = split_iterations(
+            iterations,
+            min_chunks=SOBOL_REPLICATES if variance_reduction == "sobol" else 1,
+            even=variance_reduction == "antithetic"
+        )
+        child_seeds = seed_sequence.spawn(len(chunk_sizes))
+        
+        return [
+            (current_supply, adoption_rate, days, size, engine, self.model_parameters, child_seed, variance_reduction)
+            for size, child_seed in zip(chunk_sizes, child_seeds)
+        ]
+    
+    @staticmethod
+    def _run_chunks(
+        tasks: List[tuple],
+        executor: Optional["ScenarioExecutor"],
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> List[SimulationChunk]:
+        """Run chunk tasks in-process or on the executor, preserving task order"""
+        total_iterations = sum(task[3] for task in tasks)
+        completed_iterations = 0
+        
+        def _on_task_done(index: int):
+            nonlocal completed_iterations
+            completed_iterations += tasks[index][3]
+            if progress_callback:
+                progress_callback(completed_iterations, total_iterations)
+        
+        if executor is None:
+            chunks = []
+            for index, task in enumerate(tasks):
+                chunks.append(simulate_chunk(*task))
+                _on_task_done(index)
+            return chunks
+        return executor.run(simulate_chunk, tasks, on_task_done=_on_task_done)
+    
+    def _run_adaptive(
+        self,
+        tasks: List[tuple],
+        executor: Optional["ScenarioExecutor"],
+        progress_callback: Optional[ProgressCallback],
+        standard_error: Callable[[List[SimulationChunk]], float],
+        tolerance: Optional[float],
+        time_budget: Optional[float],
+        min_chunks: int = MIN_ADAPTIVE_CHUNKS
+    ) -> Tuple[List[SimulationChunk], str]:
+        """
+        Run chunk tasks in rounds of one chunk per worker until the estimate converges
+        
+        The tolerance is first checked once min_chunks chunks are in.
+        
+        Returns:
+            Tuple[chunks used, stopping reason: "tolerance", "time_budget" or "max_iterations"]
         """
-        results = []
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        round_size = executor.max_workers if executor is not None else 1
+        total_iterations = sum(task[3] for task in tasks)
+        chunks: List[SimulationChunk] = []
+        checked = min_chunks - 1
         
-        for _ in range(iterations):
-            supply = current_supply
-            daily_supplies = [supply]
+        while len(chunks) < len(tasks):
+            offset = sum(task[3] for task in tasks[:len(chunks)])
             
-            for day in range(days):
-                daily_adoption = np.random.normal(adoption_rate, adoption_rate * 0.2)
-                daily_adoption = max(0, daily_adoption)
-                
-                base_daily_emission = supply * 0.001
-                
-                adoption_factor = 1 + (daily_adoption / 100)
-                daily_emission = base_daily_emission * adoption_factor
-                
-                market_volatility = np.random.uniform(-0.05, 0.05)
-                daily_emission *= (1 + market_volatility)
-                
-                supply += daily_emission
-                daily_supplies.append(supply)
+            def _on_progress(completed: int, _total: int, offset: int = offset):
+                progress_callback(offset + completed, total_iterations)
             
-            final_supply = daily_supplies[-1]
-            inflation = ((final_supply - current_supply) / current_supply) * 100
-            results.append({
-                'final_supply': final_supply,
-                'inflation': inflation,
-                'daily_supplies': daily_supplies
-            })
-        
-        inflations = [r['inflation'] for r in results]
-        final_supplies = [r['final_supply'] for r in results]
-        
-        predicted_inflation = np.mean(inflations)
+            batch = tasks[len(chunks):len(chunks) + round_size]
+            chunks.extend(self._run_chunks(batch, executor, _on_progress if progress_callback else None))
+            
+            if tolerance is not None:
+                for used in range(checked + 1, len(chunks) + 1):
+                    if CONFIDENCE_Z * standard_error(chunks[:used]) <= tolerance:
+                        return chunks[:used], "tolerance"
+                checked = max(checked, len(chunks))
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                return chunks, "time_budget"
+        
+        return chunks, "max_iterations"
+    
+    def _summarize_chunks(
+        self,
+        chunks: List[SimulationChunk],
+        current_supply: float,
+        adoption_rate: float,
+        days: int,
+        engine: str,
+        variance_reduction: str,
+        seed_sequence: np.random.SeedSequence
+    ) -> Dict:
+        """Reduce chunk partials into the simulation statistics"""
+        final_supplies = np.concatenate([chunk.final_supplies for chunk in chunks])
+        inflations = ((final_supplies - current_supply) / current_supply) * 100
+        
+        predicted_inflation, standard_error = self._estimate_inflation(
+            chunks, inflations, current_supply, adoption_rate, days, variance_reduction
+        )
         inflation_std = np.std(inflations)
         percentile_95 = np.percentile(inflations, 95)
         percentile_5 = np.percentile(inflations, 5)
         
-        avg_daily_path = np.mean([r['daily_supplies'] for r in results], axis=0)
+        path_summary = SupplyPathAggregator(days)
+        for chunk in chunks:
+            path_summary.merge(chunk.path_summary)
+        band_5, band_50, band_95 = path_summary.quantiles([0.05, 0.50, 0.95])
         
-        simulation_result = {
+        return {
             'predicted_inflation': predicted_inflation,
+            'standard_error': standard_error,
             'inflation_std': inflation_std,
             'confidence_interval_95': percentile_95,
             'confidence_interval_5': percentile_5,
             'mean_final_supply': np.mean(final_supplies),
             'current_supply': current_supply,
             'forecast_days': days,
-            'iterations': iterations,
-            'avg_supply_path': avg_daily_path.tolist(),
+            'iterations': len(final_supplies),
+            'engine': engine,
+            'variance_reduction': variance_reduction,
+            'seed': seed_sequence.entropy,
+            'avg_supply_path': path_summary.mean.tolist(),
+            'supply_band_p5': band_5.tolist(),
+            'supply_band_p50': band_50.tolist(),
+            'supply_band_p95': band_95.tolist(),
             'timestamp': datetime.utcnow().isoformat()
         }
+    
+    def _estimate_inflation(
+        self,
+        chunks: List[SimulationChunk],
+        inflations: np.ndarray,
+        current_supply: float,
+        adoption_rate: float,
+        days: int,
+        variance_reduction: str
+    ) -> Tuple[float, float]:
+        """
+        Mean inflation and the standard error of that estimate
         
-        self.simulation_history.append(simulation_result)
+        Returns:
+            Tuple[predicted_inflation, standard_error]
+        """
+        def _to_inflation(supplies: np.ndarray) -> np.ndarray:
+            return ((supplies - current_supply) / current_supply) * 100
         
-        return simulation_result
+        def _mean_and_error(samples: np.ndarray) -> Tuple[float, float]:
+            error = np.std(samples, ddof=1) / np.sqrt(len(samples)) if len(samples) > 1 else 0.0
+            return float(np.mean(samples)), float(error)
+        
+        if variance_reduction == "antithetic":
+            pair_means = []
+            for chunk in chunks:
+                chunk_inflations = _to_inflation(chunk.final_supplies)
+                half = len(chunk_inflations) // 2
+                pair_means.append((chunk_inflations[:half] + chunk_inflations[half:]) / 2)
+            return _mean_and_error(np.concatenate(pair_means))
+        
+        if variance_reduction == "control_variate":
+            controls = np.concatenate([chunk.controls for chunk in chunks])
+            expected = expected_emission_control(adoption_rate, days, self.model_parameters)
+            control_variance = np.var(controls, ddof=1)
+            beta = np.cov(inflations, controls)[0, 1] / control_variance if control_variance > 0 else 0.0
+            return _mean_and_error(inflations - beta * (controls - expected))
+        
+        if variance_reduction == "sobol":
+            replicate_means = np.array([np.mean(_to_inflation(chunk.final_supplies)) for chunk in chunks])
+            _, error = _mean_and_error(replicate_means)
+            return float(np.mean(inflations)), error
+        
+        return _mean_and_error(inflations)
     
     def evaluate_deflationary_protocol(self, predicted_inflation: float) -> Tuple[bool, float]:
         """
@@ -112,10 +641,16 @@ class EconomySimulator:
         
         return False, self.current_xp_to_gami_rate
     
-    def adjust_emission_rate(self, simulation_result: Dict) -> Dict:
+    def adjust_emission_rate(self, simulation_result: Dict, apply: bool = True) -> Dict:
         """
         Adjust XP-to-GAMI conversion rate based on simulation results
         
+        Args:
+            simulation_result: Output of run_monte_carlo_simulation
+            apply: Install the new rate locally. Pass False when a shared
+                rate store assigns the version; the decision then reports
+                the version currently in effect.
+        
         Returns:
             Dict with decision details
         """
@@ -133,11 +668,44 @@ class EconomySimulator:
             'reason': f"Inflation {predicted_inflation:.2f}% {'exceeds' if trigger_deflation else 'within'} threshold"
         }
         
-        if trigger_deflation:
-            self.current_xp_to_gami_rate = new_rate
+        if trigger_deflation and apply:
+            self.set_emission_rate(new_rate)
         
+        decision['rate_version'] = self.rate_version
         return decision
     
+    def set_emission_rate(self, new_rate: float, version: Optional[int] = None) -> int:
+        """
+        Replace the XP-to-GAMI conversion rate
+        
+        Args:
+            new_rate: XP per GAMI
+            version: Version assigned by a shared rate store; the update is
+                ignored unless it is at least the current version. Omit to
+                bump the local version by one.
+        
+        Returns:
+            The rate version now in effect
+        """
+        with self._rate_lock:
+            if version is None:
+                version = self.rate_version + 1
+            elif version < self.rate_version:
+                return self.rate_version
+            self.current_xp_to_gami_rate = new_rate
+            self.rate_version = version
+            return self.rate_version
+    
+    def get_rate_snapshot(self) -> Tuple[float, int]:
+        """
+        Read the rate and its version together
+        
+        Returns:
+            Tuple[xp_to_gami_rate, rate_version]
+        """
+        with self._rate_lock:
+            return self.current_xp_to_gami_rate, self.rate_version
+    
     def get_current_emission_rate(self) -> float:
         """Return current XP-to-GAMI conversion rate"""
         return self.current_xp_to_gami_rate
@@ -150,34 +718,101 @@ class EconomySimulator:
         gami_amount = xp_amount / self.current_xp_to_gami_rate
         return round(gami_amount, 6)
     
-    def get_simulation_history(self, limit: int = 10) -> List[Dict]:
-        """Retrieve recent simulation history"""
-        return self.simulation_history[-limit:]
+    def calculate_gami_amounts(self, xp_amounts: List[int]) -> Tuple[np.ndarray, float, int]:
+        """
+        Convert many XP amounts against one rate snapshot
+        
+        A concurrent rate change cannot split the batch across two rates.
+        
+        Returns:
+            Tuple[gami_amounts, xp_to_gami_rate, rate_version]
+        """
+        rate, version = self.get_rate_snapshot()
+        gami_amounts = np.round(np.asarray(xp_amounts, dtype=np.float64) / rate, 6)
+        return gami_amounts, rate, version
+    
+    def get_simulation_history(
+        self,
+        limit: int = 10,
+        cursor: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Retrieve a page of simulation history, oldest first
+        
+        Returns:
+            Tuple[entries, next_cursor] where next_cursor pages further back (None at the start)
+        """
+        return self.simulation_history.page(limit=limit, cursor=cursor)
     
     def forecast_supply_curve(
         self,
         current_supply: float,
         adoption_rates: List[float],
-        days_per_scenario: int = 30
+        days_per_scenario: int = 30,
+        iterations: int = 500,
+        engine: str = "vectorized",
+        seed: SeedLike = None,
+        executor: Optional["ScenarioExecutor"] = None,
+        variance_reduction: str = "none"
     ) -> Dict:
         """
         Run multiple scenarios with different adoption rates
         Useful for strategic planning
+        
+        Every scenario gets an independent child stream of the seed. With an
+        executor, the chunks of all scenarios are submitted together so the
+        pool stays busy regardless of how many adoption rates are requested.
+        Each scenario carries cache_hit, True when the whole forecast was reused.
         """
+        cache_key = self._cache_key(
+            "forecast",
+            current_supply=current_supply,
+            adoption_rates=list(adoption_rates),
+            days=days_per_scenario,
+            iterations=iterations,
+            engine=engine,
+            variance_reduction=variance_reduction,
+            seed=seed
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            for scenario in cached.values():
+                scenario['cache_hit'] = True
+            return cached
+        
+        seed_sequence = resolve_seed_sequence(seed)
+        scenario_seeds = seed_sequence.spawn(len(adoption_rates))
+        
+        scenario_tasks = [
+            self._chunk_tasks(
+                current_supply, rate, days_per_scenario, iterations, engine, scenario_seed, variance_reduction
+            )
+            for rate, scenario_seed in zip(adoption_rates, scenario_seeds)
+        ]
+        
+        chunks = self._run_chunks([task for tasks in scenario_tasks for task in tasks], executor)
+        
         scenarios = {}
+        offset = 0
         
-        for rate in adoption_rates:
-            result = self.run_monte_carlo_simulation(
-                current_supply=current_supply,
-                adoption_rate=rate,
-                days=days_per_scenario,
-                iterations=500
+        for rate, tasks in zip(adoption_rates, scenario_tasks):
+            scenario_chunks = chunks[offset:offset + len(tasks)]
+            offset += len(tasks)
+            
+            result = self._summarize_chunks(
+                scenario_chunks, current_supply, rate, days_per_scenario, engine, variance_reduction, seed_sequence
             )
+            self.simulation_history.append(result)
             
             scenarios[f"adoption_{rate}%"] = {
                 'predicted_inflation': result['predicted_inflation'],
+                'standard_error': result['standard_error'],
                 'mean_final_supply': result['mean_final_supply'],
-                'confidence_95': result['confidence_interval_95']
+                'confidence_95': result['confidence_interval_95'],
+                'seed': result['seed'],
+                'cache_hit': False
             }
         
+        self._cache_set(cache_key, scenarios)
+        
         return scenarios
@@ -0,0 +1,93 @@
+"""
+Economy Management Agent - Simulation Job Store
+Tracks asynchronous simulation jobs and their results in Redis
+"""
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.database import redis_pipeline
+
+JOB_KEY_PREFIX = "economy:simulation_job:"
+
+
+class SimulationJobStore:
+    """
+    Redis hash per job: status, progress and, once finished, the result
+
+    Status moves queued -> running -> completed | failed. Keys expire after
+    ttl_seconds so abandoned jobs do not accumulate. Request handlers use the
+    async client; progress updates come from simulation worker threads and
+    use the sync one.
+    """
+
+    def __init__(self, redis_client, async_redis_client, ttl_seconds: Optional[int] = None):
+        self.redis = redis_client
+        self.async_redis = async_redis_client
+        self.ttl_seconds = ttl_seconds or int(os.getenv("SIMULATION_JOB_TTL", "86400"))
+
+    def _key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    def _update(self, job_id: str, fields: Dict):
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(job_id), mapping=fields)
+        pipe.expire(self._key(job_id), self.ttl_seconds)
+        pipe.execute()
+
+    async def _update_async(self, job_id: str, fields: Dict):
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        await redis_pipeline([
+            ("hset", self._key(job_id), {"mapping": fields}),
+            ("expire", self._key(job_id), self.ttl_seconds)
+        ], client=self.async_redis)
+
+    async def create(self, request: Dict) -> str:
+        """Register a queued job and return its ID"""
+        job_id = str(uuid4())
+        await self._update_async(job_id, {
+            "job_id": job_id,
+            "status": "queued",
+            "progress": 0.0,
+            "completed_iterations": 0,
+            "request": json.dumps(request),
+            "created_at": datetime.utcnow().isoformat()
+        })
+        return job_id
+
+    def update_progress(self, job_id: str, completed_iterations: int, total_iterations: int):
+        """Record chunk progress; safe to call from simulation worker threads"""
+        self._update(job_id, {
+            "status": "running",
+            "progress": round(completed_iterations / total_iterations, 4),
+            "completed_iterations": completed_iterations
+        })
+
+    def mark_running(self, job_id: str):
+        """Record that a worker has picked the job up; safe to call from simulation worker threads"""
+        self._update(job_id, {"status": "running"})
+
+    async def complete(self, job_id: str, result: Dict):
+        await self._update_async(job_id, {"status": "completed", "progress": 1.0, "result": json.dumps(result)})
+
+    async def fail(self, job_id: str, error: str):
+        await self._update_async(job_id, {"status": "failed", "error": error})
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Return the job record, or None if unknown or expired"""
+        job = await self.async_redis.hgetall(self._key(job_id))
+        if not job:
+            return None
+
+        job["progress"] = float(job.get("progress", 0))
+        job["completed_iterations"] = int(job.get("completed_iterations", 0))
+        for field in ("request", "result"):
+            if field in job:
+                job[field] = json.loads(job[field])
+        return job
@@ -0,0 +1,116 @@
+"""
+Economy Management Agent - Streaming Path Statistics
+Constant-memory per-day mean and percentile bands over simulated supply paths
+"""
+from typing import Sequence
+
+import numpy as np
+
+SKETCH_SIZE = 128
+
+
+def _interpolate(sorted_values: np.ndarray, positions: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolate each row at the given levels
+
+    Args:
+        sorted_values: (d, m) values sorted within each row
+        positions: (m,) shared or (d, m) per-row increasing mass positions in [0, 1]
+        levels: (k,) quantile levels in [0, 1]
+
+    Returns:
+        (d, k) interpolated quantiles
+    """
+    d, m = sorted_values.shape
+    if m == 1:
+        return np.repeat(sorted_values, len(levels), axis=1)
+
+    if positions.ndim == 1:
+        upper = np.clip(np.searchsorted(positions, levels), 1, m - 1)
+        x0, x1 = positions[upper - 1], positions[upper]
+        y0, y1 = sorted_values[:, upper - 1], sorted_values[:, upper]
+    else:
+        # Shift each row into its own interval so one searchsorted serves all rows
+        offsets = np.arange(d)[:, None] * 2.0
+        flat_positions = (positions + offsets).ravel()
+        flat_targets = (levels[None, :] + offsets).ravel()
+        row_start = np.repeat(np.arange(d) * m, len(levels))
+        upper = np.clip(np.searchsorted(flat_positions, flat_targets), row_start + 1, row_start + m - 1)
+        flat_values = sorted_values.ravel()
+        x0 = flat_positions[upper - 1].reshape(d, -1) - offsets
+        x1 = flat_positions[upper].reshape(d, -1) - offsets
+        y0 = flat_values[upper - 1].reshape(d, -1)
+        y1 = flat_values[upper].reshape(d, -1)
+
+    span = np.where(x1 > x0, x1 - x0, 1.0)
+    fraction = np.clip((levels - x0) / span, 0.0, 1.0)
+    return y0 + fraction * (y1 - y0)
+
+
+class SupplyPathAggregator:
+    """
+    Mergeable per-day summary of supply paths
+
+    Keeps a running mean per day and a quantile sketch of sketch_size
+    equal-mass points per day, so memory is O(sketch_size * days) no matter
+    how many iterations are folded in. Sketch quantiles are accurate to
+    roughly 1/sketch_size in rank.
+    """
+
+    def __init__(self, days: int, sketch_size: int = SKETCH_SIZE):
+        self.sketch_size = sketch_size
+        self.count = 0
+        self.mean = np.zeros(days + 1)
+        self.sketch = np.empty((days + 1, 0))
+
+    def update(self, paths: np.ndarray):
+        """Fold a (iterations, days + 1) batch of paths into the summary"""
+        sorted_paths = np.ascontiguousarray(paths.T)
+        sorted_paths.sort(axis=1)
+
+        batch = SupplyPathAggregator(paths.shape[1] - 1, self.sketch_size)
+        batch.count = paths.shape[0]
+        batch.mean = paths.mean(axis=0)
+        if batch.count <= self.sketch_size:
+            batch.sketch = sorted_paths
+        else:
+            positions = (np.arange(batch.count) + 0.5) / batch.count
+            batch.sketch = _interpolate(sorted_paths, positions, self._levels())
+        self.merge(batch)
+
+    def merge(self, other: "SupplyPathAggregator"):
+        """Combine with another summary of the same horizon"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.sketch = other.count, other.mean.copy(), other.sketch.copy()
+            return
+
+        total = self.count + other.count
+        self.mean = self.mean + (other.mean - self.mean) * (other.count / total)
+
+        values = np.concatenate([self.sketch, other.sketch], axis=1)
+        point_weights = np.concatenate([
+            np.full(self.sketch.shape[1], self.count / self.sketch.shape[1]),
+            np.full(other.sketch.shape[1], other.count / other.sketch.shape[1])
+        ])
+
+        order = np.argsort(values, axis=1)
+        sorted_values = np.take_along_axis(values, order, axis=1)
+        if values.shape[1] > self.sketch_size:
+            sorted_weights = point_weights[order]
+            cumulative = np.cumsum(sorted_weights, axis=1)
+            positions = (cumulative - sorted_weights / 2) / total
+            self.sketch = _interpolate(sorted_values, positions, self._levels())
+        else:
+            self.sketch = sorted_values
+        self.count = total
+
+    def quantiles(self, levels: Sequence[float]) -> np.ndarray:
+        """(len(levels), days + 1) per-day quantiles, levels in [0, 1]"""
+        points = self.sketch.shape[1]
+        positions = (np.arange(points) + 0.5) / points
+        return _interpolate(self.sketch, positions, np.asarray(levels, dtype=float)).T
+
+    def _levels(self) -> np.ndarray:
+        return (np.arange(self.sketch_size) + 0.5) / self.sketch_size
@@ -4,7 +4,8 @@ Generates personalized quests using RL-based difficulty optimization
 """
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import sys
 import os
@@ -12,7 +13,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.schemas import UserProfile, Quest, MCPEvent, UserIdentity
-from shared.database import get_db, init_db, UserDB, QuestDB, MCPEventDB
+from shared.database import get_async_db, database_pool_metrics, UserDB, QuestDB, MCPEventDB
 from quest_engine import QuestEngine
 
 app = FastAPI(
@@ -26,15 +27,14 @@ quest_engine = QuestEngine()
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
-    init_db()
+    """Initialize quest agent on startup (the schema is migrated before the service starts)"""
     print("Quest Generation Agent initialized")
 
 
 @app.post("/generate-quest", response_model=Quest)
 async def generate_quest(
     user_profile: UserProfile,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a personalized quest for a user
@@ -57,7 +57,7 @@ async def generate_quest(
             status="ACTIVE"
         )
         db.add(quest_db)
-        db.commit()
+        await db.commit()
         
         return quest
         
@@ -70,29 +70,33 @@ async def submit_feedback(
     user_id: str,
     quest_id: str,
     retained: bool,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit retention feedback to update Q-learning model
     Called by orchestrator to improve quest recommendations
     """
     try:
-        quest = db.query(QuestDB).filter(QuestDB.quest_id == quest_id).first()
+        quest = await db.get(QuestDB, quest_id)
         if not quest:
             raise HTTPException(status_code=404, detail="Quest not found")
         
-        user = db.query(UserDB).filter(UserDB.wallet_id == user_id).first()
+        user = await db.get(UserDB, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
         rep_bucket = int(user.reputation_score // 20)
-        events_count = db.query(MCPEventDB).filter(MCPEventDB.user_id == user_id).count()
+        events_count = await db.scalar(
+            select(func.count()).select_from(MCPEventDB).where(MCPEventDB.user_id == user_id)
+        )
         activity_bucket = min(events_count // 5, 4)
         
-        quests_completed = db.query(QuestDB).filter(
-            QuestDB.user_id == user_id,
-            QuestDB.status == "COMPLETED"
-        ).count()
+        quests_completed = await db.scalar(
+            select(func.count()).select_from(QuestDB).where(
+                QuestDB.user_id == user_id,
+                QuestDB.status == "COMPLETED"
+            )
+        )
         completion_rate = min(int((quests_completed / 10) * 10), 10) if quests_completed else 0
         
         state = f"{rep_bucket}:{activity_bucket}:{completion_rate}"
@@ -111,9 +115,9 @@ async def submit_feedback(
 
 
 @app.get("/quest/{quest_id}", response_model=dict)
-async def get_quest(quest_id: str, db: Session = Depends(get_db)):
+async def get_quest(quest_id: str, db: AsyncSession = Depends(get_async_db)):
     """Retrieve quest by ID"""
-    quest = db.query(QuestDB).filter(QuestDB.quest_id == quest_id).first()
+    quest = await db.get(QuestDB, quest_id)
     if not quest:
         raise HTTPException(status_code=404, detail="Quest not found")
     
@@ -129,9 +133,9 @@ async def get_quest(quest_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/user/{wallet_id}/quests")
-async def get_user_quests(wallet_id: str, db: Session = Depends(get_db)):
+async def get_user_quests(wallet_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all quests for a user"""
-    quests = db.query(QuestDB).filter(QuestDB.user_id == wallet_id).all()
+    quests = (await db.scalars(select(QuestDB).where(QuestDB.user_id == wallet_id))).all()
     
     return [
         {
@@ -146,6 +150,12 @@ async def get_user_quests(wallet_id: str, db: Session = Depends(get_db)):
     ]
 
 
+@app.get("/pool-metrics")
+async def pool_metrics():
+    """Database connection pool occupancy and checkout wait times"""
+    return database_pool_metrics()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,158 @@
+"""
+Security Agent - Durable Event Stream
+Redis Stream of ingested MCP events, consumed by a consumer group of security workers
+"""
+import os
+import socket
+import time
+from typing import Container, List, Optional, Tuple
+
+from redis.exceptions import ResponseError, TimeoutError as RedisTimeoutError
+
+from shared.schemas import MCPEvent
+
+STREAM_KEY = "security:events"
+CONSUMER_GROUP = "fraud_detectors"
+
+
+def _missing_stream(error: ResponseError) -> bool:
+    # The stream key or group is gone, e.g. after a Redis restart or FLUSHDB
+    message = str(error)
+    return "NOGROUP" in message or "no such key" in message.lower()
+
+
+class EventStreamBackpressure(Exception):
+    """Raised when consumers are too far behind to accept more events"""
+
+    def __init__(self, backlog: int, retry_after: int):
+        self.backlog = backlog
+        self.retry_after = retry_after
+        super().__init__(f"Event stream backlog of {backlog} events; retry after {retry_after}s")
+
+
+class EventStream:
+    """
+    Append-only event log shared by every security replica
+
+    Ingestion XADDs each event (trimmed approximately to maxlen). Workers
+    read through one consumer group, so each event goes to exactly one
+    worker, and XACK only after processing; entries a crashed worker left
+    unacknowledged for claim_idle_ms are claimed by the next reader. A
+    stream or group that disappears is recreated on the next read.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        blocking_client=None,
+        consumer_name: Optional[str] = None,
+        maxlen: Optional[int] = None,
+        max_backlog: Optional[int] = None,
+        claim_idle_ms: Optional[int] = None
+    ):
+        self.redis = redis_client
+        # XREADGROUP BLOCK outlasts the socket timeout of the regular pool
+        self.blocking_redis = blocking_client or redis_client
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.maxlen = maxlen or int(os.getenv("SECURITY_STREAM_MAXLEN", "1000000"))
+        self.max_backlog = max_backlog or int(os.getenv("SECURITY_STREAM_MAX_BACKLOG", "100000"))
+        self.claim_idle_ms = claim_idle_ms or int(os.getenv("SECURITY_STREAM_CLAIM_IDLE_MS", "60000"))
+        self._backlog_cache: Tuple[float, int] = (0.0, 0)
+
+    async def ensure_group(self):
+        """Create the stream and consumer group if they do not exist yet"""
+        try:
+            await self.redis.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def append(self, events: List[MCPEvent]) -> List[str]:
+        """Append events in one pipelined round-trip and return their stream IDs"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(STREAM_KEY, {"event": event.model_dump_json()}, maxlen=self.maxlen, approximate=True)
+            return await pipe.execute()
+
+    async def read_batch(
+        self,
+        count: int,
+        block_ms: int,
+        held: Optional[Container[str]] = None
+    ) -> List[Tuple[str, MCPEvent]]:
+        """
+        Read up to count events for this consumer
+
+        Stale entries abandoned by other consumers come first; otherwise
+        blocks up to block_ms for new ones, returning nothing on timeout. Claimed entries whose IDs are in
+        held (read by this consumer but not yet acknowledged) are left out.
+        """
+        held = held or ()
+        try:
+            _, claimed, *_ = await self.redis.xautoclaim(
+                STREAM_KEY, CONSUMER_GROUP, self.consumer_name, self.claim_idle_ms, "0-0", count=count
+            )
+            entries = [entry for entry in claimed if entry[1] and entry[0] not in held]
+
+            if not entries:
+                try:
+                    response = await self.blocking_redis.xreadgroup(
+                        CONSUMER_GROUP, self.consumer_name, {STREAM_KEY: ">"}, count=count, block=block_ms
+                    )
+                except RedisTimeoutError:
+                    # A socket timeout while blocked just means nothing new arrived
+                    response = None
+                entries = response[0][1] if response else []
+        except ResponseError as e:
+            if not _missing_stream(e):
+                raise
+            await self.ensure_group()
+            return []
+
+        return [
+            (entry_id, MCPEvent.model_validate_json(fields["event"]))
+            for entry_id, fields in entries
+        ]
+
+    async def ack(self, entry_ids: List[str]):
+        """Acknowledge processed entries"""
+        if entry_ids:
+            await self.redis.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+
+    async def backlog(self, max_age_seconds: float = 1.0) -> int:
+        """Events not yet delivered or not yet acknowledged (cached for max_age_seconds)"""
+        cached_at, cached = self._backlog_cache
+        if time.monotonic() - cached_at < max_age_seconds:
+            return cached
+
+        try:
+            groups = await self.redis.xinfo_groups(STREAM_KEY)
+        except ResponseError as e:
+            if not _missing_stream(e):
+                raise
+            # Nothing has been appended since the stream disappeared
+            groups = []
+
+        backlog = 0
+        for group in groups:
+            if group["name"] == CONSUMER_GROUP:
+                lag = group.get("lag")
+                if lag is None:
+                    # Redis < 7 does not report lag; fall back to the stream length
+                    lag = await self.redis.xlen(STREAM_KEY)
+                backlog = int(lag) + int(group["pending"])
+
+        self._backlog_cache = (time.monotonic(), backlog)
+        return backlog
+
+    async def check_backpressure(self):
+        """Raise EventStreamBackpressure when the backlog is over max_backlog"""
+        backlog = await self.backlog()
+        if backlog >= self.max_backlog:
+            raise EventStreamBackpressure(backlog, retry_after=5)
+
+    async def stats(self) -> dict:
+        return {
+            "stream_length": await self.redis.xlen(STREAM_KEY),
+            "backlog": await self.backlog(max_age_seconds=0)
+        }
@@ -0,0 +1,116 @@
+"""
+Security Agent - Feature Queries
+Per-user aggregates computed in the database, so only one row per user comes back
+"""
+from datetime import datetime
+from typing import Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.database import MCPEventDB
+from features import BURST_GAP_SECONDS, EventColumns, UserAggregates, feature_matrix, user_features
+
+_epoch = func.extract("epoch", MCPEventDB.timestamp)
+_xp = func.coalesce(MCPEventDB.meta_data["xp_earned"].as_float(), 0.0)
+
+
+def _pushdown(db: AsyncSession) -> bool:
+    # var_pop, EXTRACT(EPOCH ...) and ->> are PostgreSQL; other databases aggregate in process
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _column(rows, index: int) -> np.ndarray:
+    # Postgres returns numeric (Decimal) for EXTRACT and var_pop; NULL aggregates become 0
+    return np.array([row[index] or 0 for row in rows], dtype=np.float64)
+
+
+async def fetch_user_aggregates(db: AsyncSession, since: datetime) -> UserAggregates:
+    """Event count, XP total and first/last timestamp per user since the cutoff"""
+    if not _pushdown(db):
+        rows = (await db.execute(
+            select(MCPEventDB.user_id, MCPEventDB.timestamp, MCPEventDB.meta_data)
+            .where(MCPEventDB.timestamp >= since)
+        )).all()
+        return UserAggregates.from_rows(rows)
+
+    rows = (await db.execute(
+        select(MCPEventDB.user_id, func.count(), func.sum(_xp), func.min(_epoch), func.max(_epoch))
+        .where(MCPEventDB.timestamp >= since)
+        .group_by(MCPEventDB.user_id)
+    )).all()
+
+    return UserAggregates(
+        user_ids=np.array([row[0] for row in rows], dtype=object),
+        counts=np.array([row[1] for row in rows], dtype=np.int64),
+        xp_totals=_column(rows, 2),
+        first_seen=_column(rows, 3),
+        last_seen=_column(rows, 4)
+    )
+
+
+async def fetch_user_features(db: AsyncSession, since: datetime) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Fraud feature rows for every user with events since the cutoff
+
+    Inter-event gaps come from LAG() over each user's events ordered by
+    timestamp; their mean, population variance and burst count are then
+    aggregated by the same GROUP BY as the counts.
+
+    Returns:
+        Tuple[user_ids, (users, 7) feature matrix, events aggregated]
+    """
+    if not _pushdown(db):
+        rows = (await db.execute(
+            select(
+                MCPEventDB.user_id, MCPEventDB.timestamp, MCPEventDB.source,
+                MCPEventDB.action_type, MCPEventDB.meta_data
+            ).where(MCPEventDB.timestamp >= since)
+        )).all()
+        columns = EventColumns.from_rows(rows)
+        return columns.user_ids, user_features(columns), len(columns)
+
+    window = select(
+        MCPEventDB.user_id,
+        MCPEventDB.source,
+        MCPEventDB.action_type,
+        _xp.label("xp"),
+        _epoch.label("epoch"),
+        (_epoch - func.lag(_epoch).over(
+            partition_by=MCPEventDB.user_id, order_by=MCPEventDB.timestamp
+        )).label("gap")
+    ).where(MCPEventDB.timestamp >= since).subquery()
+
+    rows = (await db.execute(
+        select(
+            window.c.user_id,
+            func.count(),
+            func.sum(window.c.xp),
+            func.min(window.c.epoch),
+            func.max(window.c.epoch),
+            func.count(window.c.action_type.distinct()),
+            func.sum(case((window.c.source == "web3", 1), else_=0)),
+            func.avg(window.c.gap),
+            func.var_pop(window.c.gap),
+            func.sum(case((window.c.gap < BURST_GAP_SECONDS, 1), else_=0))
+        ).group_by(window.c.user_id)
+    )).all()
+
+    counts = np.array([row[1] for row in rows], dtype=np.int64)
+    features = feature_matrix(
+        counts=counts,
+        xp_totals=_column(rows, 2),
+        first_seen=_column(rows, 3),
+        last_seen=_column(rows, 4),
+        action_types=_column(rows, 5),
+        web3_counts=_column(rows, 6),
+        avg_intervals=_column(rows, 7),
+        interval_variances=_column(rows, 8),
+        bursts=_column(rows, 9)
+    )
+    return np.array([row[0] for row in rows], dtype=object), features, int(counts.sum())
@@ -0,0 +1,215 @@
+"""
+Security Agent - Streaming Feature Store
+Per-user, per-day running aggregates in Redis, updated as events are ingested
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.schemas import MCPEvent
+from features import BURST_GAP_SECONDS, FEATURE_WINDOW_DAYS, epoch_seconds, feature_matrix, feature_window_start
+
+FEATURE_KEY_PREFIX = "security:features"
+DAY_SECONDS = 86400
+
+# Folds one user's events (oldest first) into their per-day state. Gaps
+# between two events of the same day use Welford's update, so the mean and
+# variance need no event history. The gap from the user's previous event
+# on an earlier day is kept apart as the day's entry gap, since it only
+# belongs to a window that also covers that earlier event. Events older
+# than the last one seen still count, but add no gap.
+# KEYS: user hash (last_ts), then (day hash, day action set) per day touched
+# ARGV: burst_gap, ttl, then (day index, timestamp, xp, is_web3, action_type) per event
+UPDATE_SCRIPT = """
+local fields = {'count', 'xp_total', 'web3_count', 'first_ts', 'last_ts', 'gap_n', 'gap_mean', 'gap_m2', 'bursts', 'entry_from', 'entry_gap'}
+local burst_gap = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local last_ts = tonumber(redis.call('HGET', KEYS[1], 'last_ts'))
+local days = {}
+
+for i = 3, #ARGV, 5 do
+    local day = tonumber(ARGV[i])
+    local ts = tonumber(ARGV[i + 1])
+    local state = days[day]
+    if state == nil then
+        local stored = redis.call('HMGET', KEYS[2 * day], unpack(fields))
+        state = {}
+        for j, name in ipairs(fields) do
+            state[name] = tonumber(stored[j])
+        end
+        for _, name in ipairs({'count', 'xp_total', 'web3_count', 'gap_n', 'gap_mean', 'gap_m2', 'bursts'}) do
+            state[name] = state[name] or 0
+        end
+        days[day] = state
+    end
+
+    state.count = state.count + 1
+    state.xp_total = state.xp_total + tonumber(ARGV[i + 2])
+    state.web3_count = state.web3_count + tonumber(ARGV[i + 3])
+    redis.call('SADD', KEYS[2 * day + 1], ARGV[i + 4])
+
+    if state.first_ts == nil or ts < state.first_ts then
+        state.first_ts = ts
+    end
+    if state.last_ts == nil or ts > state.last_ts then
+        state.last_ts = ts
+    end
+
+    if last_ts ~= nil and ts >= last_ts then
+        local gap = ts - last_ts
+        if math.floor(last_ts / 86400) == math.floor(ts / 86400) then
+            state.gap_n = state.gap_n + 1
+            local delta = gap - state.gap_mean
+            state.gap_mean = state.gap_mean + delta / state.gap_n
+            state.gap_m2 = state.gap_m2 + delta * (gap - state.gap_mean)
+            if gap < burst_gap then
+                state.bursts = state.bursts + 1
+            end
+        else
+            state.entry_from = last_ts
+            state.entry_gap = gap
+        end
+    end
+    if last_ts == nil or ts > last_ts then
+        last_ts = ts
+    end
+end
+
+for day, state in pairs(days) do
+    local values = {}
+    for _, name in ipairs(fields) do
+        if state[name] ~= nil then
+            table.insert(values, name)
+            table.insert(values, string.format('%.17g', state[name]))
+        end
+    end
+    redis.call('HSET', KEYS[2 * day], unpack(values))
+    redis.call('EXPIRE', KEYS[2 * day], ttl)
+    redis.call('EXPIRE', KEYS[2 * day + 1], ttl)
+end
+redis.call('HSET', KEYS[1], 'last_ts', string.format('%.17g', last_ts))
+redis.call('EXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+
+def feature_keys(user_id: str, day: int) -> List[str]:
+    # The {user_id} hash tag keeps every key of a user in one cluster slot for the script
+    return [f"{FEATURE_KEY_PREFIX}:{{{user_id}}}:{day}", f"{FEATURE_KEY_PREFIX}:{{{user_id}}}:{day}:actions"]
+
+
+def user_key(user_id: str) -> str:
+    return f"{FEATURE_KEY_PREFIX}:{{{user_id}}}"
+
+
+class UserFeatureStore:
+    """
+    Precomputed fraud features per user over the training window
+
+    Ingestion folds each new event into the user's state for its UTC day
+    (counts, XP and web3 totals, first/last timestamp, Welford mean/variance
+    of inter-event gaps, burst count, action-type set) with one script call
+    per user. Scoring merges the days since feature_window_start(), the
+    window /train-model uses, so it reads the 7 features without touching
+    the database. Day state expires once it falls out of the window.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.ttl = (FEATURE_WINDOW_DAYS + 1) * DAY_SECONDS
+        self._update = redis_client.register_script(UPDATE_SCRIPT)
+
+    async def update(self, events: List[MCPEvent]) -> int:
+        """
+        Fold events into their users' state in one pipelined round-trip
+
+        Returns:
+            Number of users updated
+        """
+        by_user: Dict[str, List[MCPEvent]] = defaultdict(list)
+        for event in events:
+            by_user[event.user_id].append(event)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id, user_events in by_user.items():
+                keys = [user_key(user_id)]
+                day_index: Dict[int, int] = {}
+                args = [BURST_GAP_SECONDS, self.ttl]
+                for event in sorted(user_events, key=lambda e: epoch_seconds(e.timestamp)):
+                    ts = epoch_seconds(event.timestamp)
+                    day = math.floor(ts / DAY_SECONDS)
+                    if day not in day_index:
+                        day_index[day] = len(day_index) + 1
+                        keys.extend(feature_keys(user_id, day))
+                    args.extend([
+                        day_index[day],
+                        repr(ts),
+                        repr(float(event.meta_data.get("xp_earned", 0))),
+                        int(event.source != "web2"),
+                        event.action_type
+                    ])
+                await self._update(keys=keys, args=args, client=pipe)
+            await pipe.execute()
+
+        return len(by_user)
+
+    async def get_features(self, user_id: str, now: Optional[datetime] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        The user's 7-feature vector over the training window and the number
+        of events behind it, or None when nothing is stored for that window
+        """
+        window_start = epoch_seconds(feature_window_start(now))
+        first_day = math.floor(window_start / DAY_SECONDS)
+        days = range(first_day, first_day + FEATURE_WINDOW_DAYS)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for day in days:
+                pipe.hgetall(feature_keys(user_id, day)[0])
+            pipe.sunion([feature_keys(user_id, day)[1] for day in days])
+            *states, action_types = await pipe.execute()
+
+        states = [{name: float(value) for name, value in state.items()} for state in states if state]
+        if not states:
+            return None
+
+        count = sum(state["count"] for state in states)
+        bursts = sum(state["bursts"] for state in states)
+        gap_n, gap_mean, gap_m2 = 0.0, 0.0, 0.0
+
+        def _merge(n: float, mean: float, m2: float):
+            # Chan et al. pairwise combination of two (count, mean, M2) summaries
+            nonlocal gap_n, gap_mean, gap_m2
+            if not n:
+                return
+            total = gap_n + n
+            delta = mean - gap_mean
+            gap_mean += delta * n / total
+            gap_m2 += m2 + delta * delta * gap_n * n / total
+            gap_n = total
+
+        for state in states:
+            _merge(state["gap_n"], state["gap_mean"], state["gap_m2"])
+            # A gap from an event before the window is not part of it
+            if state.get("entry_from", -math.inf) >= window_start:
+                _merge(1.0, state["entry_gap"], 0.0)
+                bursts += state["entry_gap"] < BURST_GAP_SECONDS
+
+        features = feature_matrix(
+            counts=np.array([count]),
+            xp_totals=np.array([sum(state["xp_total"] for state in states)]),
+            first_seen=np.array([min(state["first_ts"] for state in states)]),
+            last_seen=np.array([max(state["last_ts"] for state in states)]),
+            action_types=np.array([len(action_types)]),
+            web3_counts=np.array([sum(state["web3_count"] for state in states)]),
+            avg_intervals=np.array([gap_mean]),
+            interval_variances=np.array([gap_m2 / gap_n if gap_n else 0.0]),
+            bursts=np.array([bursts])
+        )[0]
+        return features, int(count)
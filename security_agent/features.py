@@ -0,0 +1,270 @@
+"""
+Security Agent - Batch Feature Extraction
+Columnar event arrays, per-user aggregates and fraud features computed with segment reductions
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.schemas import MCPEvent
+
+FEATURE_NAMES = (
+    "event_frequency",
+    "xp_rate",
+    "action_diversity",
+    "web3_ratio",
+    "time_variance",
+    "avg_event_interval",
+    "event_burst_score",
+)
+# Consecutive events closer than this count towards the burst score
+BURST_GAP_SECONDS = 10.0
+# Floor on a user's active span, so one-off events do not divide by zero
+MIN_SPAN_HOURS = 0.1
+# Training and the feature store both describe a user by their last N days of events
+FEATURE_WINDOW_DAYS = int(os.getenv("SECURITY_FEATURE_WINDOW_DAYS", "7"))
+
+
+def epoch_seconds(timestamp: datetime) -> float:
+    """Epoch seconds, treating naive timestamps as UTC like the events table does"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def feature_window_start(now: Optional[datetime] = None) -> datetime:
+    """
+    Start (naive UTC midnight) of the FEATURE_WINDOW_DAYS UTC days ending today
+
+    Whole days, so the feature store's per-day state covers exactly the
+    events training reads.
+    """
+    now = now or datetime.utcnow()
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=FEATURE_WINDOW_DAYS - 1)
+
+
+@dataclass(slots=True)
+class EventColumns:
+    """
+    Events as parallel arrays sorted by (user, timestamp)
+
+    Each user's events form one contiguous segment: user_codes[i] indexes
+    user_ids, and starts/counts give every user's segment.
+    """
+    user_ids: np.ndarray
+    user_codes: np.ndarray
+    starts: np.ndarray
+    counts: np.ndarray
+    timestamps: np.ndarray
+    xp: np.ndarray
+    is_web3: np.ndarray
+    action_codes: np.ndarray
+
+    @classmethod
+    def from_events(cls, events: List[MCPEvent]) -> "EventColumns":
+        """Build the columns in one pass over the events"""
+        return cls.from_rows(
+            [(e.user_id, e.timestamp, e.source, e.action_type, e.meta_data) for e in events]
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "EventColumns":
+        """Build the columns from (user_id, timestamp, source, action_type, meta_data) rows"""
+        count = len(rows)
+        users: Dict[str, int] = {}
+        actions: Dict[str, int] = {}
+
+        user_codes = np.fromiter(
+            (users.setdefault(row[0], len(users)) for row in rows), dtype=np.int64, count=count
+        )
+        timestamps = np.fromiter((epoch_seconds(row[1]) for row in rows), dtype=np.float64, count=count)
+        is_web3 = np.fromiter((row[2] != "web2" for row in rows), dtype=bool, count=count)
+        action_codes = np.fromiter(
+            (actions.setdefault(row[3], len(actions)) for row in rows), dtype=np.int64, count=count
+        )
+        xp = np.fromiter(((row[4] or {}).get("xp_earned", 0) for row in rows), dtype=np.float64, count=count)
+
+        return cls.from_codes(
+            np.array(list(users), dtype=object), user_codes, timestamps, xp, is_web3, action_codes
+        )
+
+    @classmethod
+    def from_codes(
+        cls,
+        user_ids: np.ndarray,
+        user_codes: np.ndarray,
+        timestamps: np.ndarray,
+        xp: np.ndarray,
+        is_web3: np.ndarray,
+        action_codes: np.ndarray
+    ) -> "EventColumns":
+        """Sort integer-coded event arrays into per-user segments"""
+        order = np.lexsort((timestamps, user_codes))
+        user_codes = user_codes[order]
+        counts = np.bincount(user_codes, minlength=len(user_ids))
+
+        return cls(
+            user_ids=user_ids,
+            user_codes=user_codes,
+            starts=np.cumsum(counts) - counts,
+            counts=counts,
+            timestamps=timestamps[order],
+            xp=xp[order],
+            is_web3=is_web3[order],
+            action_codes=action_codes[order]
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+@dataclass(slots=True)
+class UserAggregates:
+    """Per-user event count, XP total and first/last timestamp (epoch seconds)"""
+    user_ids: np.ndarray
+    counts: np.ndarray
+    xp_totals: np.ndarray
+    first_seen: np.ndarray
+    last_seen: np.ndarray
+
+    @classmethod
+    def from_events(cls, events: List[MCPEvent], since: Optional[datetime] = None) -> "UserAggregates":
+        """Aggregate events at or after since in one pass, without sorting"""
+        return cls.from_rows([(e.user_id, e.timestamp, e.meta_data) for e in events], since)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple], since: Optional[datetime] = None) -> "UserAggregates":
+        """Aggregate (user_id, timestamp, meta_data) rows at or after since"""
+        count = len(rows)
+        users: Dict[str, int] = {}
+
+        user_codes = np.fromiter(
+            (users.setdefault(row[0], len(users)) for row in rows), dtype=np.int64, count=count
+        )
+        timestamps = np.fromiter((epoch_seconds(row[1]) for row in rows), dtype=np.float64, count=count)
+        xp = np.fromiter(((row[2] or {}).get("xp_earned", 0) for row in rows), dtype=np.float64, count=count)
+
+        if since is not None:
+            recent = timestamps >= epoch_seconds(since)
+            user_codes, timestamps, xp = user_codes[recent], timestamps[recent], xp[recent]
+
+        return cls.from_codes(np.array(list(users), dtype=object), user_codes, timestamps, xp)
+
+    @classmethod
+    def from_codes(
+        cls,
+        user_ids: np.ndarray,
+        user_codes: np.ndarray,
+        timestamps: np.ndarray,
+        xp: np.ndarray
+    ) -> "UserAggregates":
+        n_users = len(user_ids)
+        first_seen = np.full(n_users, np.inf)
+        last_seen = np.full(n_users, -np.inf)
+        np.minimum.at(first_seen, user_codes, timestamps)
+        np.maximum.at(last_seen, user_codes, timestamps)
+
+        return cls(
+            user_ids=user_ids,
+            counts=np.bincount(user_codes, minlength=n_users),
+            xp_totals=np.bincount(user_codes, weights=xp, minlength=n_users),
+            first_seen=first_seen,
+            last_seen=last_seen
+        )
+
+    def span_hours(self) -> np.ndarray:
+        """Active span per user, floored at MIN_SPAN_HOURS (users without events get the floor)"""
+        span = np.where(self.counts > 0, self.last_seen - self.first_seen, 0.0)
+        return np.maximum(span / 3600, MIN_SPAN_HOURS)
+
+
+def user_features(columns: EventColumns) -> np.ndarray:
+    """
+    All 7 fraud features for every user in one pass
+
+    Each feature is a per-segment reduction (np.bincount over user codes),
+    so the cost is linear in the number of events however many users
+    there are. Users without events get a zero row.
+
+    Returns:
+        (len(columns.user_ids), 7) array, columns ordered as FEATURE_NAMES
+    """
+    n_users = len(columns.user_ids)
+    users = columns.user_codes
+    timestamps = columns.timestamps
+
+    if not len(columns):
+        return np.zeros((n_users, len(FEATURE_NAMES)))
+
+    active = columns.counts > 0
+    first_seen = np.zeros(n_users)
+    last_seen = np.zeros(n_users)
+    first_seen[active] = timestamps[columns.starts[active]]
+    last_seen[active] = timestamps[columns.starts[active] + columns.counts[active] - 1]
+
+    # Distinct (user, action) pairs, counted per user
+    n_actions = int(columns.action_codes.max()) + 1
+    pairs = np.unique(users * n_actions + columns.action_codes)
+
+    # Gaps between consecutive events of the same user
+    same_user = users[1:] == users[:-1]
+    gaps = np.diff(timestamps)[same_user]
+    owners = users[1:][same_user]
+    n_gaps = np.maximum(columns.counts - 1, 1)
+    avg_interval = np.bincount(owners, weights=gaps, minlength=n_users) / n_gaps
+    time_variance = np.bincount(owners, weights=(gaps - avg_interval[owners]) ** 2, minlength=n_users) / n_gaps
+
+    return feature_matrix(
+        counts=columns.counts,
+        xp_totals=np.bincount(users, weights=columns.xp, minlength=n_users),
+        first_seen=first_seen,
+        last_seen=last_seen,
+        action_types=np.bincount(pairs // n_actions, minlength=n_users),
+        web3_counts=np.bincount(users, weights=columns.is_web3, minlength=n_users),
+        avg_intervals=avg_interval,
+        interval_variances=time_variance,
+        bursts=np.bincount(owners, weights=gaps < BURST_GAP_SECONDS, minlength=n_users)
+    )
+
+
+def feature_matrix(
+    counts: np.ndarray,
+    xp_totals: np.ndarray,
+    first_seen: np.ndarray,
+    last_seen: np.ndarray,
+    action_types: np.ndarray,
+    web3_counts: np.ndarray,
+    avg_intervals: np.ndarray,
+    interval_variances: np.ndarray,
+    bursts: np.ndarray
+) -> np.ndarray:
+    """
+    Assemble the feature rows from per-user aggregates
+
+    Shared by the in-process reductions and the SQL GROUP BY query, so
+    both produce identical features. Timestamps are epoch seconds; the
+    interval mean/variance are population statistics over the count - 1
+    gaps between consecutive events (0 for users with a single event).
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    active = counts > 0
+    span_hours = np.maximum(np.where(active, last_seen - first_seen, 0.0) / 3600, MIN_SPAN_HOURS)
+
+    features = np.zeros((len(counts), len(FEATURE_NAMES)))
+    features[:, 0] = counts / span_hours
+    features[:, 1] = xp_totals / span_hours
+    features[:, 2] = action_types
+    features[:, 3] = np.divide(web3_counts, counts, out=np.zeros(len(counts)), where=active)
+    features[:, 4] = interval_variances
+    features[:, 5] = avg_intervals
+    features[:, 6] = bursts / np.maximum(counts - 1, 1)
+    return features
@@ -7,13 +7,13 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from typing import List, Dict, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.schemas import MCPEvent, FraudAlert
+from features import FEATURE_NAMES, EventColumns, UserAggregates, user_features
 
 
 class FraudDetector:
@@ -47,76 +47,40 @@ class FraudDetector:
         - Action type diversity
         - Source distribution (web2 vs web3)
         - Time variance (consistent vs sporadic)
-        """
-        if not events:
-            return np.zeros(7)
         
+        Events may arrive in any order (e.g. newest first from the
+        database); intervals are taken between timestamp-sorted events.
+        """
         user_events = [e for e in events if e.user_id == user_id]
         
         if not user_events:
-            return np.zeros(7)
-        
-        time_span = (max(e.timestamp for e in user_events) - 
-                     min(e.timestamp for e in user_events)).total_seconds()
-        time_span_hours = max(time_span / 3600, 0.1)
-        
-        event_frequency = len(user_events) / time_span_hours
-        
-        total_xp = sum(e.meta_data.get('xp_earned', 0) for e in user_events)
-        xp_rate = total_xp / time_span_hours
-        
-        action_types = set(e.action_type for e in user_events)
-        action_diversity = len(action_types)
-        
-        web2_count = sum(1 for e in user_events if e.source == 'web2')
-        web3_count = len(user_events) - web2_count
-        web3_ratio = web3_count / len(user_events)
-        
-        timestamps = [e.timestamp.timestamp() for e in user_events]
-        time_variance = np.var(np.diff(timestamps)) if len(timestamps) > 1 else 0
+            return np.zeros(len(FEATURE_NAMES))
         
-        avg_event_interval = np.mean(np.diff(timestamps)) if len(timestamps) > 1 else 0
-        
-        event_burst_score = sum(
-            1 for i in range(len(timestamps) - 1)
-            if timestamps[i+1] - timestamps[i] < 10
-        ) / max(len(timestamps) - 1, 1)
-        
-        features = np.array([
-            event_frequency,
-            xp_rate,
-            action_diversity,
-            web3_ratio,
-            time_variance,
-            avg_event_interval,
-            event_burst_score
-        ])
-        
-        return features
+        return user_features(EventColumns.from_events(user_events))[0]
     
     def train_model(self, all_events: List[MCPEvent]):
         """
         Train Isolation Forest on event data
         Should be called periodically with historical data
+        Features for all users are built in one pass over the events
         """
-        user_ids = list(set(e.user_id for e in all_events))
-        
-        features_list = []
-        for user_id in user_ids:
-            features = self.extract_features(all_events, user_id)
-            features_list.append(features)
-        
-        if len(features_list) < 10:
+        self.fit_features(user_features(EventColumns.from_events(all_events)))
+    
+    def fit_features(self, X: np.ndarray):
+        """
+        Train Isolation Forest on a precomputed (users, 7) feature matrix
+        e.g. one aggregated in the database
+        """
+        if len(X) < 10:
             print("Warning: Not enough data to train model effectively")
             return
         
-        X = np.array(features_list)
         X_scaled = self.scaler.fit_transform(X)
         
         self.model.fit(X_scaled)
         self.is_trained = True
         
-        print(f"Fraud detector trained on {len(user_ids)} users")
+        print(f"Fraud detector trained on {len(X)} users")
     
     def detect_anomaly(
         self,
@@ -132,7 +96,17 @@ class FraudDetector:
         if not self.is_trained:
             return False, 0.0, "Model not trained"
         
-        features = self.extract_features(events, user_id)
+        return self.score_features(self.extract_features(events, user_id))
+    
+    def score_features(self, features: np.ndarray) -> Tuple[bool, float, str]:
+        """
+        Score a precomputed 7-feature vector (e.g. from the feature store)
+        
+        Returns:
+            Tuple[is_anomaly: bool, anomaly_score: float, reason: str]
+        """
+        if not self.is_trained:
+            return False, 0.0, "Model not trained"
         
         if np.all(features == 0):
             return False, 0.0, "Insufficient data"
@@ -142,7 +116,7 @@ class FraudDetector:
         prediction = self.model.predict(features_scaled)[0]
         anomaly_score = -self.model.score_samples(features_scaled)[0]
         
-        is_anomaly = prediction == -1
+        is_anomaly = bool(prediction == -1)
         
         reason = self._generate_reason(features, is_anomaly)
         
@@ -156,46 +130,32 @@ class FraudDetector:
         """
         Detect Sybil attack clusters
         Identifies users generating XP 3x faster than standard deviation
+        Per-user totals are aggregated in one pass over the events, so
+        the cost is linear in event count.
         
         Returns:
             List of suspicious user IDs
         """
         cutoff_time = datetime.utcnow() - timedelta(hours=lookback_hours)
-        recent_events = [e for e in all_events if e.timestamp >= cutoff_time]
-        
-        user_xp_rates = defaultdict(float)
-        user_time_spans = defaultdict(float)
-        
-        for user_id in set(e.user_id for e in recent_events):
-            user_events = [e for e in recent_events if e.user_id == user_id]
-            
-            if len(user_events) < 2:
-                continue
-            
-            total_xp = sum(e.meta_data.get('xp_earned', 0) for e in user_events)
-            
-            time_span = (max(e.timestamp for e in user_events) - 
-                        min(e.timestamp for e in user_events)).total_seconds()
-            time_span_hours = max(time_span / 3600, 0.1)
-            
-            user_xp_rates[user_id] = total_xp / time_span_hours
-            user_time_spans[user_id] = time_span_hours
-        
-        if not user_xp_rates:
-            return []
-        
-        xp_rates = list(user_xp_rates.values())
-        mean_rate = np.mean(xp_rates)
-        std_rate = np.std(xp_rates)
+        return self.find_sybil_users(UserAggregates.from_events(all_events, since=cutoff_time))
+    
+    def find_sybil_users(self, aggregates: UserAggregates) -> List[str]:
+        """
+        Users whose XP rate is more than xp_multiplier_threshold standard
+        deviations above the mean, among users with at least 2 events,
+        sustained for over half an hour
+        """
+        span_hours = aggregates.span_hours()
+        xp_rates = aggregates.xp_totals / span_hours
+        eligible = aggregates.counts >= 2
         
-        threshold = mean_rate + (self.xp_multiplier_threshold * std_rate)
+        if not eligible.any():
+            return []
         
-        suspicious_users = [
-            user_id for user_id, rate in user_xp_rates.items()
-            if rate > threshold and user_time_spans[user_id] > 0.5
-        ]
+        threshold = xp_rates[eligible].mean() + (self.xp_multiplier_threshold * xp_rates[eligible].std())
         
-        return suspicious_users
+        suspicious = eligible & (xp_rates > threshold) & (span_hours > 0.5)
+        return aggregates.user_ids[suspicious].tolist()
     
     def _generate_reason(self, features: np.ndarray, is_anomaly: bool) -> str:
         """Generate human-readable reason for anomaly detection"""
@@ -2,20 +2,31 @@
 Security Agent - FastAPI Microservice
 Fraud detection and Sybil attack prevention
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Depends
+from typing import Dict, List
+from datetime import datetime, timedelta, timezone
 import asyncio
-from sqlalchemy.orm import Session
+import time
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.schemas import MCPEvent, FraudAlert
-from shared.database import get_db, init_db, UserDB, MCPEventDB, FraudAlertDB, redis_client
+from shared.database import (
+    get_async_db, database_pool_metrics, bulk_insert, engine, AsyncSessionLocal, UserDB, MCPEventDB, MCPEventIdDB,
+    FraudAlertDB, async_redis_client, async_redis_blocking_client
+)
+from shared.partitions import maintain_partitions
 from fraud_detector import FraudDetector
+from feature_queries import fetch_user_aggregates, fetch_user_features
+from feature_store import UserFeatureStore
+from window_counters import WindowCounters
+from features import FEATURE_NAMES, EventColumns, feature_window_start, user_features
+from event_stream import EventStream, EventStreamBackpressure
 
 app = FastAPI(
     title="Security Agent",
@@ -28,34 +39,139 @@ fraud_detector = FraudDetector(
     xp_multiplier_threshold=3.0
 )
 
-event_stream_buffer: List[MCPEvent] = []
+event_stream = EventStream(async_redis_client, async_redis_blocking_client)
+feature_store = UserFeatureStore(async_redis_client)
+window_counters = WindowCounters(async_redis_client)
+
+STREAM_MIN_BATCH = int(os.getenv("SECURITY_STREAM_MIN_BATCH", "100"))
+STREAM_MAX_BATCH = int(os.getenv("SECURITY_STREAM_MAX_BATCH", "5000"))
+STREAM_BLOCK_MS = int(os.getenv("SECURITY_STREAM_BLOCK_MS", "10000"))
+PARTITION_MAINTENANCE_SECONDS = int(os.getenv("EVENT_PARTITION_MAINTENANCE_SECONDS", "3600"))
+# Ids per IN list, well under the 32767 bind parameters asyncpg allows per statement
+EVENT_ID_CHUNK = 1000
+
+
+def to_naive_utc(timestamp: datetime) -> datetime:
+    """Normalize to naive UTC to match the timestamp columns"""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def lock_unstreamed(db: AsyncSession, event_ids: List[str]) -> List[str]:
+    """
+    Lock the ids among event_ids whose events are stored but not yet streamed
+    
+    Ids locked by another request are skipped, so concurrent retries of a
+    batch stream each event once.
+    """
+    unstreamed = []
+    for start in range(0, len(event_ids), EVENT_ID_CHUNK):
+        unstreamed.extend((await db.execute(
+            select(MCPEventIdDB.event_id)
+            .where(
+                MCPEventIdDB.event_id.in_(event_ids[start:start + EVENT_ID_CHUNK]),
+                MCPEventIdDB.streamed.is_(False)
+            )
+            .with_for_update(skip_locked=True)
+        )).scalars())
+    return unstreamed
+
+
+async def load_events(db: AsyncSession, event_ids: List[str]) -> List[MCPEvent]:
+    """Stored events by id, the earliest copy of an id stored more than once"""
+    events: Dict[str, MCPEvent] = {}
+    for start in range(0, len(event_ids), EVENT_ID_CHUNK):
+        rows = (await db.execute(
+            select(
+                MCPEventDB.event_id, MCPEventDB.user_id, MCPEventDB.source,
+                MCPEventDB.action_type, MCPEventDB.meta_data, MCPEventDB.timestamp
+            )
+            .where(MCPEventDB.event_id.in_(event_ids[start:start + EVENT_ID_CHUNK]))
+            .order_by(MCPEventDB.timestamp)
+        )).all()
+        for row in rows:
+            events.setdefault(row.event_id, MCPEvent(**row._mapping))
+    return list(events.values())
+
+
+async def mark_streamed(db: AsyncSession, event_ids: List[str]):
+    for start in range(0, len(event_ids), EVENT_ID_CHUNK):
+        await db.execute(
+            update(MCPEventIdDB)
+            .where(MCPEventIdDB.event_id.in_(event_ids[start:start + EVENT_ID_CHUNK]))
+            .values(streamed=True)
+        )
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize security agent on startup"""
-    init_db()
+    """Initialize security agent on startup (the schema is migrated before the service starts)"""
+    try:
+        await event_stream.ensure_group()
+    except Exception as e:
+        # The monitoring loop recreates the group once Redis is reachable
+        print(f"Redis stream initialization warning: {e}")
     
     asyncio.create_task(event_monitoring_loop())
+    asyncio.create_task(partition_maintenance_loop())
     
     print("Security Agent initialized - Fraud detection active")
 
 
+async def partition_maintenance_loop():
+    """
+    Background task that keeps mcp_events partitions ahead of the clock
+    Creates upcoming partitions and drops those past the retention window
+    """
+    while True:
+        await asyncio.sleep(PARTITION_MAINTENANCE_SECONDS)
+        try:
+            changes = await asyncio.to_thread(maintain_partitions, engine)
+            if changes["created"] or changes["dropped"]:
+                print(f"Event partitions created {changes['created']}, dropped {changes['dropped']}")
+        except Exception as e:
+            print(f"Partition maintenance error: {e}")
+
+
 async def event_monitoring_loop():
     """
     Background task that continuously monitors event stream
-    Simulates consuming MCP events from a message queue
+    Consumes the Redis Stream as one member of the fraud_detectors group, so
+    replicas split the load. Events are acknowledged only after their batch
+    is processed; a batch is processed once more than STREAM_MIN_BATCH events
+    are in hand, when a read times out with nothing new, or before the oldest
+    held event gets close to the claim idle time. At most STREAM_MAX_BATCH
+    are held at a time, keyed by entry ID so a re-delivered entry is held once.
     """
+    pending: Dict[str, MCPEvent] = {}
+    held_since = 0.0
+    max_hold_seconds = event_stream.claim_idle_ms / 2000
+    
     while True:
         try:
-            await asyncio.sleep(10)
+            entries = await event_stream.read_batch(
+                count=STREAM_MAX_BATCH - len(pending),
+                block_ms=min(STREAM_BLOCK_MS, int(max_hold_seconds * 1000)),
+                held=pending
+            )
+            if entries and not pending:
+                held_since = time.monotonic()
+            for entry_id, event in entries:
+                pending.setdefault(entry_id, event)
             
-            if len(event_stream_buffer) > 100:
-                await process_event_batch(event_stream_buffer.copy())
-                event_stream_buffer.clear()
+            if pending and (
+                len(pending) > STREAM_MIN_BATCH
+                or not entries
+                or time.monotonic() - held_since >= max_hold_seconds
+            ):
+                await process_event_batch(list(pending.values()))
+                await event_stream.ack(list(pending))
+                pending = {}
                 
         except Exception as e:
             print(f"Event monitoring error: {e}")
+            await asyncio.sleep(1)
 
 
 async def process_event_batch(events: List[MCPEvent]):
@@ -68,20 +184,21 @@ async def process_event_batch(events: List[MCPEvent]):
     if suspicious_users:
         print(f"⚠️  Detected {len(suspicious_users)} suspicious users in Sybil cluster")
         for user_id in suspicious_users:
-            await handle_fraud_detection(user_id, events, "Sybil cluster detected")
+            await handle_fraud_detection(user_id, "Sybil cluster detected")
 
 
-async def handle_fraud_detection(user_id: str, events: List[MCPEvent], reason: str):
+async def handle_fraud_detection(user_id: str, reason: str):
     """
     Handle detected fraud - lock user and fire circuit breaker event
     """
     try:
-        db = next(get_db())
-        
-        user = db.query(UserDB).filter(UserDB.wallet_id == user_id).first()
-        if user and user.status != "LOCKED":
+        async with AsyncSessionLocal() as db:
+            user = await db.get(UserDB, user_id)
+            if not user or user.status == "LOCKED":
+                return
+            
             user.status = "LOCKED"
-            db.commit()
+            await db.commit()
             
             fraud_alert = FraudAlert(
                 user_id=user_id,
@@ -98,83 +215,141 @@ async def handle_fraud_detection(user_id: str, events: List[MCPEvent], reason: s
                 action_taken=fraud_alert.action_taken
             )
             db.add(alert_db)
-            db.commit()
-            
-            try:
-                redis_client.publish(
-                    "circuit_breaker",
-                    f"FRAUD_DETECTED:{user_id}:{reason}"
-                )
-            except Exception as e:
-                print(f"Redis publish warning: {e}")
-            
-            print(f"🔒 User {user_id} LOCKED - {reason}")
+            await db.commit()
+        
+        try:
+            await async_redis_client.publish(
+                "circuit_breaker",
+                f"FRAUD_DETECTED:{user_id}:{reason}"
+            )
+        except Exception as e:
+            print(f"Redis publish warning: {e}")
         
-        db.close()
+        print(f"🔒 User {user_id} LOCKED - {reason}")
         
     except Exception as e:
         print(f"Fraud handling error: {e}")
 
 
 @app.post("/ingest-events")
-async def ingest_events(events: List[MCPEvent], db: Session = Depends(get_db)):
+async def ingest_events(
+    events: List[MCPEvent],
+    dedupe: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Ingest MCP events for fraud detection
-    Events are added to buffer and processed asynchronously
+    Stored events not yet on the Redis event stream are appended to it and processed
+    asynchronously, including those an earlier attempt of the batch stored but failed to stream
+    Rows are bulk-inserted; with dedupe, events whose event_id is already stored are skipped
+    whatever their timestamp, otherwise the batch is streamed with COPY and a duplicate fails
+    the whole batch
+    Streamed events are folded into the per-user feature store and window counters
+    Returns 429 when stream consumers are too far behind
     """
     try:
-        event_stream_buffer.extend(events)
+        await event_stream.check_backpressure()
         
-        for event in events:
-            event_db = MCPEventDB(
-                event_id=str(event.event_id),
-                user_id=event.user_id,
-                source=event.source,
-                action_type=event.action_type,
-                meta_data=event.meta_data,
-                timestamp=event.timestamp
-            )
-            db.add(event_db)
+        rows = [
+            {
+                "event_id": str(event.event_id),
+                "user_id": event.user_id,
+                "source": event.source,
+                "action_type": event.action_type,
+                "meta_data": event.meta_data,
+                "timestamp": to_naive_utc(event.timestamp)
+            }
+            for event in events
+        ]
+        ids = [{"event_id": row["event_id"], "timestamp": row["timestamp"], "streamed": False} for row in rows]
+        if dedupe:
+            # Claim the ids first: mcp_events is only unique on (event_id, timestamp)
+            claimed = {event_id for (event_id,) in await bulk_insert(
+                db, MCPEventIdDB, ids, conflict_columns=["event_id"], returning=True
+            )}
+            new_events, new_rows = [], []
+            for event, row in zip(events, rows):
+                if row["event_id"] in claimed:
+                    claimed.discard(row["event_id"])
+                    new_events.append(event)
+                    new_rows.append(row)
+            await bulk_insert(db, MCPEventDB, new_rows)
+        else:
+            await bulk_insert(db, MCPEventIdDB, ids)
+            await bulk_insert(db, MCPEventDB, rows)
+            new_events = events
+        await db.commit()
         
-        db.commit()
+        # Stored events count as ingested even if streaming them fails below;
+        # they stay unstreamed, and a retry of the batch streams them
+        unstreamed = set(await lock_unstreamed(db, list(dict.fromkeys(row["event_id"] for row in rows))))
+        stream_events = [event for event in new_events if str(event.event_id) in unstreamed]
+        stream_events += await load_events(db, list(unstreamed - {str(event.event_id) for event in stream_events}))
+        
+        await event_stream.append(stream_events)
+        
+        try:
+            await feature_store.update(stream_events)
+            await window_counters.update(stream_events)
+        except Exception as e:
+            print(f"Redis feature store warning: {e}")
+        
+        await mark_streamed(db, list(unstreamed))
+        await db.commit()
         
         return {
             "status": "success",
             "events_ingested": len(events),
-            "buffer_size": len(event_stream_buffer)
+            "events_inserted": len(new_events),
+            "duplicates_skipped": len(events) - len(new_events),
+            "events_streamed": len(stream_events),
+            "stream_backlog": await event_stream.backlog()
         }
         
+    except EventStreamBackpressure as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Event ingestion failed: {str(e)}")
 
 
 @app.post("/detect-anomaly/{user_id}")
-async def detect_anomaly(user_id: str, db: Session = Depends(get_db)):
+async def detect_anomaly(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Run anomaly detection for specific user
     Returns anomaly score and detection result
+    Scores the user's precomputed features over the training window from the
+    feature store; users with nothing stored fall back to their last 100 events in that window
     """
     try:
-        db_events = db.query(MCPEventDB).filter(
-            MCPEventDB.user_id == user_id
-        ).order_by(MCPEventDB.timestamp.desc()).limit(100).all()
+        stored = None
+        try:
+            stored = await feature_store.get_features(user_id)
+        except Exception as e:
+            print(f"Redis feature store warning: {e}")
         
-        events = [
-            MCPEvent(
-                event_id=e.event_id,
-                user_id=e.user_id,
-                source=e.source,
-                action_type=e.action_type,
-                meta_data=e.meta_data,
-                timestamp=e.timestamp
-            )
-            for e in db_events
-        ]
+        if stored is not None:
+            features, events_analyzed = stored
+            feature_source = "feature_store"
+        else:
+            db_events = (await db.execute(
+                select(
+                    MCPEventDB.user_id, MCPEventDB.timestamp, MCPEventDB.source,
+                    MCPEventDB.action_type, MCPEventDB.meta_data
+                )
+                .where(MCPEventDB.user_id == user_id, MCPEventDB.timestamp >= feature_window_start())
+                .order_by(MCPEventDB.timestamp.desc())
+                .limit(100)
+            )).all()
+            
+            columns = EventColumns.from_rows(db_events)
+            features = user_features(columns)[0] if len(columns) else np.zeros(len(FEATURE_NAMES))
+            events_analyzed = len(columns)
+            feature_source = "database"
         
-        is_anomaly, anomaly_score, reason = fraud_detector.detect_anomaly(events, user_id)
+        is_anomaly, anomaly_score, reason = fraud_detector.score_features(features)
         
         if is_anomaly:
-            await handle_fraud_detection(user_id, events, reason)
+            await handle_fraud_detection(user_id, reason)
         
         return {
             "user_id": user_id,
@@ -182,7 +357,8 @@ async def detect_anomaly(user_id: str, db: Session = Depends(get_db)):
             "anomaly_score": anomaly_score,
             "reason": reason,
             "action_taken": "LOCKED" if is_anomaly else "NONE",
-            "events_analyzed": len(events)
+            "events_analyzed": events_analyzed,
+            "feature_source": feature_source
         }
         
     except Exception as e:
@@ -190,35 +366,22 @@ async def detect_anomaly(user_id: str, db: Session = Depends(get_db)):
 
 
 @app.post("/train-model")
-async def train_model(db: Session = Depends(get_db)):
+async def train_model(db: AsyncSession = Depends(get_async_db)):
     """
     Train fraud detection model on historical data
     Should be called periodically
+    Per-user features are aggregated in the database, so only one row per user is loaded
+    Uses the same whole-day window the feature store scores
     """
     try:
-        cutoff_time = datetime.utcnow() - timedelta(days=7)
-        
-        db_events = db.query(MCPEventDB).filter(
-            MCPEventDB.timestamp >= cutoff_time
-        ).all()
-        
-        events = [
-            MCPEvent(
-                event_id=e.event_id,
-                user_id=e.user_id,
-                source=e.source,
-                action_type=e.action_type,
-                meta_data=e.meta_data,
-                timestamp=e.timestamp
-            )
-            for e in db_events
-        ]
+        _, features, event_count = await fetch_user_features(db, feature_window_start())
         
-        fraud_detector.train_model(events)
+        fraud_detector.fit_features(features)
         
         return {
             "status": "success",
-            "events_trained": len(events),
+            "events_trained": event_count,
+            "users_trained": len(features),
             "model_trained": fraud_detector.is_trained
         }
         
@@ -229,41 +392,27 @@ async def train_model(db: Session = Depends(get_db)):
 @app.post("/detect-sybil-cluster")
 async def detect_sybil_cluster(
     lookback_hours: int = 24,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Detect Sybil attack clusters
     Identifies users generating XP 3x faster than standard deviation
+    Per-user XP totals and time spans are aggregated in the database
     """
     try:
         cutoff_time = datetime.utcnow() - timedelta(hours=lookback_hours)
         
-        db_events = db.query(MCPEventDB).filter(
-            MCPEventDB.timestamp >= cutoff_time
-        ).all()
-        
-        events = [
-            MCPEvent(
-                event_id=e.event_id,
-                user_id=e.user_id,
-                source=e.source,
-                action_type=e.action_type,
-                meta_data=e.meta_data,
-                timestamp=e.timestamp
-            )
-            for e in db_events
-        ]
-        
-        suspicious_users = fraud_detector.detect_sybil_cluster(events, lookback_hours)
+        aggregates = await fetch_user_aggregates(db, cutoff_time)
+        suspicious_users = fraud_detector.find_sybil_users(aggregates)
         
         for user_id in suspicious_users:
-            await handle_fraud_detection(user_id, events, "Sybil cluster - excessive XP generation")
+            await handle_fraud_detection(user_id, "Sybil cluster - excessive XP generation")
         
         return {
             "suspicious_users": suspicious_users,
             "count": len(suspicious_users),
             "lookback_hours": lookback_hours,
-            "events_analyzed": len(events)
+            "events_analyzed": int(aggregates.counts.sum())
         }
         
     except Exception as e:
@@ -273,13 +422,13 @@ async def detect_sybil_cluster(
 @app.get("/fraud-alerts")
 async def get_fraud_alerts(
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retrieve recent fraud alerts"""
     try:
-        alerts = db.query(FraudAlertDB).order_by(
-            FraudAlertDB.timestamp.desc()
-        ).limit(limit).all()
+        alerts = (await db.scalars(
+            select(FraudAlertDB).order_by(FraudAlertDB.timestamp.desc()).limit(limit)
+        )).all()
         
         return {
             "alerts": [
@@ -301,17 +450,20 @@ async def get_fraud_alerts(
 
 
 @app.get("/user/{user_id}/status")
-async def get_user_status(user_id: str, db: Session = Depends(get_db)):
+async def get_user_status(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Check user security status"""
     try:
-        user = db.query(UserDB).filter(UserDB.wallet_id == user_id).first()
+        user = await db.get(UserDB, user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        alerts = db.query(FraudAlertDB).filter(
-            FraudAlertDB.user_id == user_id
-        ).order_by(FraudAlertDB.timestamp.desc()).limit(10).all()
+        alerts = (await db.scalars(
+            select(FraudAlertDB)
+            .where(FraudAlertDB.user_id == user_id)
+            .order_by(FraudAlertDB.timestamp.desc())
+            .limit(10)
+        )).all()
         
         return {
             "user_id": user_id,
@@ -327,14 +479,39 @@ async def get_user_status(user_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
 
 
+@app.get("/user/{user_id}/activity")
+async def get_user_activity(user_id: str, hours: float = 24):
+    """
+    XP rate, event frequency and burst ratio over the last hours
+    Summed from time-bucketed counters, so the cost does not grow with the events in the window
+    """
+    try:
+        return await window_counters.window(user_id, hours)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Activity query failed: {str(e)}")
+
+
+@app.get("/pool-metrics")
+async def pool_metrics():
+    """Database connection pool occupancy and checkout wait times"""
+    return database_pool_metrics()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    try:
+        stream_stats = await event_stream.stats()
+    except Exception as e:
+        stream_stats = {"stream_error": str(e)}
+    
     return {
         "status": "healthy",
         "service": "security_agent",
         "model_trained": fraud_detector.is_trained,
-        "buffer_size": len(event_stream_buffer)
+        **stream_stats
     }
 
 
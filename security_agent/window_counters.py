@@ -0,0 +1,161 @@
+"""
+Security Agent - Sliding Window Counters
+Per-user, per-minute and per-hour ring buckets in Redis for fixed-cost window queries
+"""
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.schemas import MCPEvent
+from features import BURST_GAP_SECONDS, epoch_seconds
+
+WINDOW_KEY_PREFIX = "security:windows"
+BUCKET_FIELDS = ("bucket", "events", "xp", "bursts")
+
+# Adds one user's events (oldest first) to both rings. Each ring slot holds
+# the absolute bucket number it currently counts; a slot still holding an
+# older bucket is reset before reuse, and events too old for the ring are
+# skipped. An event within burst_gap of the user's previous event counts
+# as a burst.
+# KEYS: minute ring, hour ring
+# ARGV: burst_gap, minute slots, hour slots, then (timestamp, xp) per event
+UPDATE_SCRIPT = """
+local burst_gap = tonumber(ARGV[1])
+local rings = {{KEYS[1], 60, tonumber(ARGV[2])}, {KEYS[2], 3600, tonumber(ARGV[3])}}
+local last_ts = tonumber(redis.call('HGET', KEYS[1], 'last_ts'))
+
+for i = 4, #ARGV, 2 do
+    local ts = tonumber(ARGV[i])
+    local xp = tonumber(ARGV[i + 1])
+    local burst = last_ts ~= nil and ts >= last_ts and ts - last_ts < burst_gap
+    if last_ts == nil or ts > last_ts then
+        last_ts = ts
+    end
+
+    for _, ring in ipairs(rings) do
+        local key, width, slots = ring[1], ring[2], ring[3]
+        local bucket = math.floor(ts / width)
+        local slot = bucket % slots
+        local current = tonumber(redis.call('HGET', key, slot .. ':bucket'))
+        if current == nil or current < bucket then
+            redis.call('HSET', key, slot .. ':bucket', bucket, slot .. ':events', 0, slot .. ':xp', 0, slot .. ':bursts', 0)
+            current = bucket
+        end
+        if current == bucket then
+            redis.call('HINCRBY', key, slot .. ':events', 1)
+            redis.call('HINCRBYFLOAT', key, slot .. ':xp', xp)
+            if burst then
+                redis.call('HINCRBY', key, slot .. ':bursts', 1)
+            end
+        end
+    end
+end
+
+redis.call('HSET', KEYS[1], 'last_ts', string.format('%.17g', last_ts))
+redis.call('EXPIRE', KEYS[1], 60 * tonumber(ARGV[2]))
+redis.call('EXPIRE', KEYS[2], 3600 * tonumber(ARGV[3]))
+return 1
+"""
+
+
+def window_keys(user_id: str) -> List[str]:
+    # The {user_id} hash tag keeps both rings in one cluster slot for the script
+    return [f"{WINDOW_KEY_PREFIX}:{{{user_id}}}:minute", f"{WINDOW_KEY_PREFIX}:{{{user_id}}}:hour"]
+
+
+class WindowCounters:
+    """
+    Time-bucketed activity counters per user
+
+    Every event increments its minute bucket and hour bucket (events, XP,
+    bursts) in two fixed-size rings: minute_slots minutes and hour_slots
+    hours. A window query sums at most one ring's worth of buckets. Its
+    cost depends on the window length, not on how many events fell in it.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        minute_slots: Optional[int] = None,
+        hour_slots: Optional[int] = None
+    ):
+        self.redis = redis_client
+        self.minute_slots = minute_slots or int(os.getenv("SECURITY_MINUTE_BUCKETS", "1440"))
+        self.hour_slots = hour_slots or int(os.getenv("SECURITY_HOUR_BUCKETS", "168"))
+        self._update = redis_client.register_script(UPDATE_SCRIPT)
+
+    @property
+    def max_window_hours(self) -> float:
+        return float(self.hour_slots)
+
+    async def update(self, events: List[MCPEvent]) -> int:
+        """
+        Count events into their users' buckets in one pipelined round-trip
+
+        Returns:
+            Number of users updated
+        """
+        by_user: Dict[str, List[MCPEvent]] = defaultdict(list)
+        for event in events:
+            by_user[event.user_id].append(event)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id, user_events in by_user.items():
+                args = [BURST_GAP_SECONDS, self.minute_slots, self.hour_slots]
+                for event in sorted(user_events, key=lambda e: epoch_seconds(e.timestamp)):
+                    args.extend([repr(epoch_seconds(event.timestamp)), repr(float(event.meta_data.get("xp_earned", 0)))])
+                await self._update(keys=window_keys(user_id), args=args, client=pipe)
+            await pipe.execute()
+
+        return len(by_user)
+
+    async def window(self, user_id: str, hours: float, now: Optional[float] = None) -> Dict:
+        """
+        Activity totals over the last hours, in whole buckets
+
+        Windows up to minute_slots minutes are summed from minute buckets,
+        longer ones from hour buckets. The window ends with the current
+        (partial) bucket, so its start can fall up to one bucket short of
+        the requested length.
+        """
+        if hours <= 0 or hours > self.max_window_hours:
+            raise ValueError(f"Window must be between 0 and {self.max_window_hours:g} hours")
+
+        now = time.time() if now is None else now
+        minute_key, hour_key = window_keys(user_id)
+        if hours * 60 <= self.minute_slots:
+            key, width, slots, resolution = minute_key, 60, self.minute_slots, "minute"
+        else:
+            key, width, slots, resolution = hour_key, 3600, self.hour_slots, "hour"
+
+        current = math.floor(now / width)
+        buckets = range(current - math.ceil(hours * 3600 / width) + 1, current + 1)
+        fields = [f"{bucket % slots}:{name}" for bucket in buckets for name in BUCKET_FIELDS]
+        values = await self.redis.hmget(key, fields)
+
+        totals = {"events": 0, "xp": 0.0, "bursts": 0}
+        for i, bucket in enumerate(buckets):
+            stored_bucket, events, xp, bursts = values[i * 4:i * 4 + 4]
+            if stored_bucket is None or int(stored_bucket) != bucket:
+                continue
+            totals["events"] += int(events)
+            totals["xp"] += float(xp)
+            totals["bursts"] += int(bursts)
+
+        return {
+            "user_id": user_id,
+            "window_hours": hours,
+            "resolution": resolution,
+            "buckets": len(buckets),
+            "events": totals["events"],
+            "xp_earned": totals["xp"],
+            "bursts": totals["bursts"],
+            "event_rate_per_hour": totals["events"] / hours,
+            "xp_rate_per_hour": totals["xp"] / hours,
+            "burst_ratio": totals["bursts"] / totals["events"] if totals["events"] else 0.0
+        }
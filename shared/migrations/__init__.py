@@ -0,0 +1,228 @@
+"""
+Versioned schema migrations
+
+Each migration is a module named vNNNN_<slug>.py in this package with an
+upgrade(connection) function; its docstring's first line is the
+description. Migrations run in version order, each in its own transaction
+unless the module sets TRANSACTIONAL = False (needed for CREATE INDEX
+CONCURRENTLY, which cannot run inside one). Applied versions are recorded
+in schema_migrations.
+
+Run once per deploy, before the services start:
+
+    python -m shared.migrations            # apply pending migrations
+    python -m shared.migrations --status   # list applied/pending versions
+"""
+import importlib
+import pkgutil
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from shared.partitions import maintain_partitions
+
+MIGRATIONS_TABLE = "schema_migrations"
+MIGRATION_LOCK = "schema_migrations"
+LOCK_POLL_SECONDS = 1.0
+# Postgres identifiers are truncated past this length
+MAX_IDENTIFIER_LENGTH = 63
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_\w+$")
+
+
+@dataclass(slots=True)
+class Migration:
+    """One schema change, applied at most once per database"""
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+def discover() -> List[Migration]:
+    """All migrations in this package, in version order"""
+    migrations: Dict[int, Migration] = {}
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {module_info.name}")
+        migrations[version] = Migration(
+            version=version,
+            description=(module.__doc__ or module_info.name).strip().splitlines()[0],
+            upgrade=module.upgrade,
+            transactional=getattr(module, "TRANSACTIONAL", True)
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _ensure_migrations_table(connection: Connection):
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR NOT NULL, "
+        "applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL)"
+    ))
+
+
+def applied_versions(connection: Connection) -> Dict[int, datetime]:
+    """Applied migration versions and when they were applied"""
+    _ensure_migrations_table(connection)
+    rows = connection.execute(text(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}"))
+    return {version: applied_at for version, applied_at in rows}
+
+
+def _record(connection: Connection, migration: Migration):
+    connection.execute(
+        text(
+            f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) "
+            "VALUES (:version, :description, :applied_at)"
+        ),
+        {"version": migration.version, "description": migration.description, "applied_at": datetime.utcnow()}
+    )
+
+
+def migrate(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """
+    Apply pending migrations up to target (default: all), then bring the
+    event partitions up to date
+
+    Safe to start from several processes at once: the run holds a
+    session-level advisory lock, so later runs wait and then find nothing
+    pending. Waiters poll with pg_try_advisory_lock rather than block: a
+    blocked statement is an open transaction, and CREATE INDEX CONCURRENTLY
+    in the lock holder would wait for it, deadlocking. For the same reason
+    the lock connection stays in autocommit mode.
+
+    Returns:
+        Versions applied by this run
+    """
+    if engine.dialect.name != "postgresql":
+        # Local SQLite databases are built straight from the models
+        from shared.database import Base
+        Base.metadata.create_all(bind=engine)
+        return []
+
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+        while not lock_connection.execute(
+            text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": MIGRATION_LOCK}
+        ).scalar():
+            time.sleep(LOCK_POLL_SECONDS)
+        try:
+            done = applied_versions(lock_connection)
+            for migration in discover():
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+
+                print(f"Applying migration {migration.version:04d}: {migration.description}")
+                if migration.transactional:
+                    with engine.begin() as connection:
+                        migration.upgrade(connection)
+                        _record(connection, migration)
+                else:
+                    # Each statement commits on its own; upgrade() must be safe to re-run
+                    migration.upgrade(lock_connection)
+                    _record(lock_connection, migration)
+                applied.append(migration.version)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": MIGRATION_LOCK})
+
+    maintain_partitions(engine)
+    return applied
+
+
+def status(engine: Engine) -> List[Dict]:
+    """Every known migration with its applied_at (None while pending)"""
+    with engine.connect() as connection:
+        done = applied_versions(connection) if engine.dialect.name == "postgresql" else {}
+        connection.commit()
+    return [
+        {
+            "version": migration.version,
+            "description": migration.description,
+            "transactional": migration.transactional,
+            "applied_at": done.get(migration.version)
+        }
+        for migration in discover()
+    ]
+
+
+def table_exists(connection: Connection, table: str) -> bool:
+    return connection.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table}).scalar()
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar() or False
+
+
+def _index_valid(connection: Connection, name: str) -> Optional[bool]:
+    """True/False for an existing index's validity, None when it does not exist"""
+    return connection.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+
+
+def create_index_concurrently(connection: Connection, name: str, table: str, definition: str):
+    """
+    CREATE INDEX CONCURRENTLY, resumable after a failed run
+
+    A concurrent build that fails (or is interrupted) leaves an INVALID
+    index behind, which IF NOT EXISTS would then skip; drop it and rebuild.
+    The connection must be in autocommit mode.
+    """
+    if _index_valid(connection, name) is False:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}"))
+
+
+def drop_index_concurrently(connection: Connection, name: str):
+    connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def create_partitioned_index_concurrently(connection: Connection, name: str, table: str, definition: str):
+    """
+    Build an index on a partitioned table without blocking writes
+
+    Postgres cannot build a partitioned index CONCURRENTLY, so the parent
+    index is created ON ONLY the parent (instant, starts INVALID), each
+    partition's index is built concurrently and attached, and the parent
+    becomes valid once every partition has one. Partitions created in the
+    meantime get the index automatically. Falls back to a plain concurrent
+    build when the table is not partitioned.
+    """
+    if not is_partitioned(connection, table):
+        create_index_concurrently(connection, name, table, definition)
+        return
+
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}"))
+
+    partitions = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY child.relname"
+    ), {"table": table}).scalars().all()
+
+    for partition in partitions:
+        attached = connection.execute(text(
+            "SELECT 1 FROM pg_inherits "
+            "JOIN pg_index ON pg_index.indexrelid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:index) AND pg_index.indrelid = to_regclass(:partition)"
+        ), {"index": name, "partition": partition}).first()
+        if attached:
+            continue
+
+        partition_index = (name.replace(table, partition, 1) if table in name else f"{partition}_{name}")
+        partition_index = partition_index[:MAX_IDENTIFIER_LENGTH]
+        create_index_concurrently(connection, partition_index, partition, definition)
+        connection.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}"))
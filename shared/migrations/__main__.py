@@ -0,0 +1,52 @@
+"""
+One-shot migration entry point: python -m shared.migrations [--status] [--target N]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from shared.database import engine
+from shared.migrations import migrate, status
+
+CONNECT_TIMEOUT = int(os.getenv("MIGRATE_CONNECT_TIMEOUT", "60"))
+
+
+def wait_for_database(timeout: int = CONNECT_TIMEOUT):
+    """Retry until the database accepts connections (it may still be starting)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return
+        except OperationalError as e:
+            if time.monotonic() >= deadline:
+                raise
+            print(f"Database not ready, retrying: {e.orig}")
+            time.sleep(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations and exit")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    args = parser.parse_args()
+
+    wait_for_database()
+
+    if args.status:
+        for migration in status(engine):
+            applied_at = migration["applied_at"]
+            state = f"applied {applied_at.isoformat()}" if applied_at else "pending"
+            print(f"{migration['version']:04d}  {state:<35}  {migration['description']}")
+        return
+
+    applied = migrate(engine, target=args.target)
+    print(f"Applied migrations {applied}" if applied else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Baseline schema: users, mcp_events, quests and fraud_alerts
+
+The tables as the services first created them with create_all. Databases
+that already have a table keep it untouched.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.migrations import table_exists
+
+TABLES = {
+    "users": [
+        "CREATE TABLE users ("
+        "wallet_id VARCHAR NOT NULL, "
+        "xp_balance INTEGER NOT NULL, "
+        "reputation_score FLOAT NOT NULL, "
+        "status VARCHAR NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE, "
+        "updated_at TIMESTAMP WITHOUT TIME ZONE, "
+        "PRIMARY KEY (wallet_id))",
+        "CREATE INDEX ix_users_wallet_id ON users (wallet_id)",
+    ],
+    "mcp_events": [
+        "CREATE TABLE mcp_events ("
+        "event_id VARCHAR NOT NULL, "
+        "user_id VARCHAR NOT NULL, "
+        "source VARCHAR NOT NULL, "
+        "action_type VARCHAR NOT NULL, "
+        "meta_data JSON, "
+        "timestamp TIMESTAMP WITHOUT TIME ZONE, "
+        "PRIMARY KEY (event_id))",
+        "CREATE INDEX ix_mcp_events_user_id ON mcp_events (user_id)",
+        "CREATE INDEX ix_mcp_events_timestamp ON mcp_events (timestamp)",
+    ],
+    "quests": [
+        "CREATE TABLE quests ("
+        "quest_id VARCHAR NOT NULL, "
+        "user_id VARCHAR NOT NULL, "
+        "difficulty_rating INTEGER NOT NULL, "
+        "reward_xp INTEGER NOT NULL, "
+        "reward_gami FLOAT NOT NULL, "
+        "completion_criteria JSON NOT NULL, "
+        "status VARCHAR NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE, "
+        "completed_at TIMESTAMP WITHOUT TIME ZONE, "
+        "PRIMARY KEY (quest_id))",
+        "CREATE INDEX ix_quests_user_id ON quests (user_id)",
+    ],
+    "fraud_alerts": [
+        "CREATE TABLE fraud_alerts ("
+        "alert_id VARCHAR NOT NULL, "
+        "user_id VARCHAR NOT NULL, "
+        "anomaly_score FLOAT NOT NULL, "
+        "reason VARCHAR NOT NULL, "
+        "action_taken VARCHAR NOT NULL, "
+        "timestamp TIMESTAMP WITHOUT TIME ZONE, "
+        "PRIMARY KEY (alert_id))",
+        "CREATE INDEX ix_fraud_alerts_user_id ON fraud_alerts (user_id)",
+        "CREATE INDEX ix_fraud_alerts_timestamp ON fraud_alerts (timestamp)",
+    ],
+}
+
+
+def upgrade(connection: Connection):
+    for table, statements in TABLES.items():
+        if table_exists(connection, table):
+            continue
+        for statement in statements:
+            connection.execute(text(statement))
@@ -0,0 +1,62 @@
+"""
+Range-partition mcp_events by timestamp
+
+Rebuilds an unpartitioned mcp_events as a partitioned table with
+(event_id, timestamp) as the primary key, creating partitions that cover
+the retained history so old rows can later be dropped a partition at a
+time. Rows older than the retention window go to the default partition,
+where partition maintenance purges them. The copy holds an exclusive lock
+on the table; run it before the services start. Tables that are already
+partitioned are left alone.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.migrations import is_partitioned
+from shared.partitions import EVENTS_TABLE, RETENTION_DAYS, ensure_partitions
+
+LEGACY_TABLE = f"{EVENTS_TABLE}_unpartitioned"
+COLUMNS = "event_id, user_id, source, action_type, meta_data, timestamp"
+
+
+def upgrade(connection: Connection):
+    if is_partitioned(connection, EVENTS_TABLE):
+        return
+
+    # Free the index and constraint names for the new table
+    connection.execute(text(f"ALTER TABLE {EVENTS_TABLE} RENAME TO {LEGACY_TABLE}"))
+    connection.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {EVENTS_TABLE}_pkey TO {LEGACY_TABLE}_pkey"))
+    connection.execute(text(f"DROP INDEX IF EXISTS ix_{EVENTS_TABLE}_user_id"))
+    connection.execute(text(f"DROP INDEX IF EXISTS ix_{EVENTS_TABLE}_timestamp"))
+
+    connection.execute(text(
+        f"CREATE TABLE {EVENTS_TABLE} ("
+        "event_id VARCHAR NOT NULL, "
+        "user_id VARCHAR NOT NULL, "
+        "source VARCHAR NOT NULL, "
+        "action_type VARCHAR NOT NULL, "
+        "meta_data JSON, "
+        "timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "PRIMARY KEY (event_id, timestamp)"
+        ") PARTITION BY RANGE (timestamp)"
+    ))
+    connection.execute(text(f"CREATE INDEX ix_{EVENTS_TABLE}_user_id ON {EVENTS_TABLE} (user_id)"))
+    connection.execute(text(f"CREATE INDEX ix_{EVENTS_TABLE}_timestamp ON {EVENTS_TABLE} (timestamp)"))
+
+    now = datetime.utcnow()
+    oldest = connection.execute(text(f"SELECT min(timestamp) FROM {LEGACY_TABLE}")).scalar()
+    cutoff = now - timedelta(days=RETENTION_DAYS)
+    ensure_partitions(connection, now, since=max(oldest, cutoff) if oldest else None)
+
+    connection.execute(
+        text(
+            f"INSERT INTO {EVENTS_TABLE} ({COLUMNS}) "
+            f"SELECT event_id, user_id, source, action_type, meta_data, COALESCE(timestamp, :now) "
+            f"FROM {LEGACY_TABLE}"
+        ),
+        {"now": now}
+    )
+    connection.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+    connection.execute(text(f"ANALYZE {EVENTS_TABLE}"))
@@ -0,0 +1,29 @@
+"""
+Composite per-user indexes on mcp_events and quests
+
+Replaces the single-column user_id indexes with (user_id, timestamp DESC)
+on mcp_events and (user_id, status) on quests. Built concurrently, so
+ingestion and quest writes keep running while the indexes build.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.migrations import (
+    create_index_concurrently, create_partitioned_index_concurrently, drop_index_concurrently
+)
+
+TRANSACTIONAL = False
+
+
+def upgrade(connection: Connection):
+    create_partitioned_index_concurrently(
+        connection,
+        "ix_mcp_events_user_id_timestamp",
+        "mcp_events",
+        "(user_id, timestamp DESC) INCLUDE (event_id, source, action_type)"
+    )
+    # Partitioned indexes cannot be dropped concurrently; this only takes a brief metadata lock
+    connection.execute(text("DROP INDEX IF EXISTS ix_mcp_events_user_id"))
+
+    create_index_concurrently(connection, "ix_quests_user_id_status", "quests", "(user_id, status)")
+    drop_index_concurrently(connection, "ix_quests_user_id")
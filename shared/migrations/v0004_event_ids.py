@@ -0,0 +1,33 @@
+"""
+Unpartitioned mcp_event_ids table for deduplicating ingestion on event_id
+
+mcp_events can only be unique on (event_id, timestamp), so a retry that
+omits its timestamp would be stored again. The new table is unique on
+event_id alone and is backfilled from the stored events, keeping each
+id's earliest timestamp for retention pruning.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.migrations import table_exists
+from shared.partitions import EVENT_IDS_TABLE, EVENTS_TABLE
+
+
+def upgrade(connection: Connection):
+    if not table_exists(connection, EVENT_IDS_TABLE):
+        connection.execute(text(
+            f"CREATE TABLE {EVENT_IDS_TABLE} ("
+            "event_id VARCHAR NOT NULL, "
+            "timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+            "PRIMARY KEY (event_id))"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX ix_{EVENT_IDS_TABLE}_timestamp ON {EVENT_IDS_TABLE} (timestamp)"
+        ))
+
+    connection.execute(text(
+        f"INSERT INTO {EVENT_IDS_TABLE} (event_id, timestamp) "
+        f"SELECT event_id, min(timestamp) FROM {EVENTS_TABLE} GROUP BY event_id "
+        "ON CONFLICT (event_id) DO NOTHING"
+    ))
+    connection.execute(text(f"ANALYZE {EVENT_IDS_TABLE}"))
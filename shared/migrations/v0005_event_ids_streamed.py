@@ -0,0 +1,18 @@
+"""
+Track which stored events have been appended to the event stream
+
+Adds mcp_event_ids.streamed. Ids already stored are marked streamed, since
+they were written before the flag existed; new ids start unstreamed.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from shared.partitions import EVENT_IDS_TABLE
+
+
+def upgrade(connection: Connection):
+    # A constant default is only recorded in the catalog, so existing rows are not rewritten
+    connection.execute(text(
+        f"ALTER TABLE {EVENT_IDS_TABLE} ADD COLUMN IF NOT EXISTS streamed BOOLEAN NOT NULL DEFAULT true"
+    ))
+    connection.execute(text(f"ALTER TABLE {EVENT_IDS_TABLE} ALTER COLUMN streamed SET DEFAULT false"))
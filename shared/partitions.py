@@ -0,0 +1,153 @@
+"""
+Time-range partition management for the mcp_events table
+"""
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+EVENTS_TABLE = "mcp_events"
+DEFAULT_PARTITION = f"{EVENTS_TABLE}_default"
+EVENT_IDS_TABLE = "mcp_event_ids"
+
+PARTITION_INTERVAL = os.getenv("EVENT_PARTITION_INTERVAL", "day")
+PARTITIONS_AHEAD = int(os.getenv("EVENT_PARTITIONS_AHEAD", "3"))
+RETENTION_DAYS = int(os.getenv("EVENT_RETENTION_DAYS", "30"))
+
+_INTERVALS = {
+    "day": (timedelta(days=1), "%Y%m%d"),
+    "hour": (timedelta(hours=1), "%Y%m%d%H"),
+}
+_PARTITION_NAME = re.compile(rf"^{EVENTS_TABLE}_p(\d{{8}}|\d{{10}})$")
+
+
+def _interval(interval: str) -> Tuple[timedelta, str]:
+    if interval not in _INTERVALS:
+        raise ValueError(f"Unknown partition interval '{interval}' (expected one of {tuple(_INTERVALS)})")
+    return _INTERVALS[interval]
+
+
+def partition_start(moment: datetime, interval: str = PARTITION_INTERVAL) -> datetime:
+    """Start of the partition holding moment"""
+    _interval(interval)
+    if interval == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(start: datetime, interval: str = PARTITION_INTERVAL) -> str:
+    return f"{EVENTS_TABLE}_p{start.strftime(_interval(interval)[1])}"
+
+
+def partition_bounds(name: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a partition from its name (either interval)"""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        raise ValueError(f"Not an event partition: {name}")
+    stamp = match.group(1)
+    interval = "hour" if len(stamp) == 10 else "day"
+    step, fmt = _interval(interval)
+    start = datetime.strptime(stamp, fmt)
+    return start, start + step
+
+
+def ensure_partitions(
+    connection: Connection,
+    now: datetime,
+    interval: str = PARTITION_INTERVAL,
+    since: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create the default partition plus one partition per interval from the
+    previous interval (or the one holding since) through PARTITIONS_AHEAD
+    intervals in the future
+
+    Returns:
+        Names of partitions that were created
+    """
+    step, _ = _interval(interval)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {EVENTS_TABLE} DEFAULT"
+    ))
+
+    existing = set(list_partitions(connection))
+    created = []
+    start = partition_start(since, interval) if since else partition_start(now, interval) - step
+    end = partition_start(now, interval) + step * (PARTITIONS_AHEAD + 1)
+    while start < end:
+        name = partition_name(start, interval)
+        if name not in existing:
+            try:
+                # Fails if the default partition already holds rows in this range
+                with connection.begin_nested():
+                    connection.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {EVENTS_TABLE} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + step).isoformat()}')"
+                    ))
+                created.append(name)
+            except Exception as e:
+                print(f"Partition {name} not created: {e}")
+        start += step
+    return created
+
+
+def drop_expired_partitions(connection: Connection, now: datetime, retention_days: int = RETENTION_DAYS) -> List[str]:
+    """
+    Drop partitions whose whole range is older than the retention window,
+    purge expired rows that landed in the default partition and prune the
+    deduplication ids of expired events
+
+    Returns:
+        Names of partitions that were dropped
+    """
+    cutoff = now - timedelta(days=retention_days)
+    dropped = []
+    for name in list_partitions(connection):
+        _, end = partition_bounds(name)
+        if end <= cutoff:
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+
+    connection.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+        {"cutoff": cutoff}
+    )
+    # Absent until migration 0004 has run
+    if connection.execute(text("SELECT to_regclass(:table)"), {"table": EVENT_IDS_TABLE}).scalar():
+        connection.execute(
+            text(f"DELETE FROM {EVENT_IDS_TABLE} WHERE timestamp < :cutoff"),
+            {"cutoff": cutoff}
+        )
+    return dropped
+
+
+def list_partitions(connection: Connection) -> List[str]:
+    """Range partitions of the events table (the default partition excluded)"""
+    rows = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table"
+    ), {"table": EVENTS_TABLE})
+    return sorted(name for (name,) in rows if _PARTITION_NAME.match(name))
+
+
+def maintain_partitions(engine: Engine, now: datetime = None) -> Dict[str, List[str]]:
+    """
+    Create upcoming partitions and drop expired ones (PostgreSQL only)
+
+    Safe to run from every replica: DDL runs under a transaction-level
+    advisory lock, so concurrent runs serialize.
+    """
+    if engine.dialect.name != "postgresql":
+        return {"created": [], "dropped": []}
+
+    now = now or datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": EVENTS_TABLE})
+        created = ensure_partitions(connection, now)
+        dropped = drop_expired_partitions(connection, now)
+    return {"created": created, "dropped": dropped}
@@ -77,6 +77,11 @@ class EconomySimulationInput(BaseModel):
     iterations: int = Field(
         default=1000, ge=100, le=10000, description="Monte Carlo iterations"
     )
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="RNG seed; repeated seeded runs are served from the economy result cache",
+    )
 
 
 @dataclass(slots=True)